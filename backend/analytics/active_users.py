@@ -0,0 +1,137 @@
+"""Active-user bitmaps (one per day plus 'all') for DAU/WAU/MAU and all-time unique users."""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ActiveUserBitmap, ActiveUserIndex, BookView, SearchQuery
+
+ALL_TIME_KEY = 'all'
+BACKFILL_BATCH_SIZE = 10000
+
+
+def _day_key(day):
+    return day.isoformat()
+
+
+def get_user_positions(user_ids):
+    """{user_id: bit position}, assigning positions to users seen for the first time."""
+    user_ids = set(user_ids)
+    positions = dict(ActiveUserIndex.objects.filter(user_id__in=user_ids).values_list('user_id', 'pk'))
+    missing = user_ids - positions.keys()
+    if missing:
+        ActiveUserIndex.objects.bulk_create(
+            [ActiveUserIndex(user_id=user_id) for user_id in missing], ignore_conflicts=True
+        )
+        positions.update(ActiveUserIndex.objects.filter(user_id__in=missing).values_list('user_id', 'pk'))
+    return positions
+
+
+# Bit i is bit i % 8 of byte i // 8, so bitmaps of different lengths line up
+def _to_int(bits):
+    return int.from_bytes(bytes(bits), 'little')
+
+
+def _to_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def mark_active(activity):
+    """Set the bits of users active on given days, from (user_id, day) pairs, in a fixed number of queries."""
+    days = {}
+    for user_id, day in activity:
+        if user_id is not None:
+            days.setdefault(_day_key(day), set()).add(user_id)
+    if not days:
+        return
+    _merge_bits(_day_bits(days))
+
+
+def _day_bits(days, updates=None):
+    """Add {day key: user ids} to {bitmap key: int}, the 'all' bitmap included."""
+    updates = {} if updates is None else updates
+    positions = get_user_positions(set().union(*days.values()))
+    for key, user_ids in days.items():
+        for user_id in user_ids:
+            bit = 1 << positions[user_id]
+            updates[key] = updates.get(key, 0) | bit
+            updates[ALL_TIME_KEY] = updates.get(ALL_TIME_KEY, 0) | bit
+    return updates
+
+
+def _merge_bits(updates):
+    """OR {bitmap key: int} into the stored bitmaps in one transaction."""
+    with transaction.atomic():
+        # Create missing rows first so every bitmap can be locked: concurrent writers then
+        # OR into the same row instead of overwriting each other's new rows
+        ActiveUserBitmap.objects.bulk_create(
+            [ActiveUserBitmap(key=key) for key in updates], ignore_conflicts=True
+        )
+        bitmaps = list(ActiveUserBitmap.objects.select_for_update().filter(key__in=updates).order_by('key'))
+        now = timezone.now()
+        for bitmap in bitmaps:
+            bitmap.bits = _to_bytes(_to_int(bitmap.bits) | updates[bitmap.key])
+            bitmap.updated_at = now
+        ActiveUserBitmap.objects.bulk_update(bitmaps, ['bits', 'updated_at'])
+
+
+def backfill_active_users(batch_size=BACKFILL_BATCH_SIZE):
+    """Set the bits of every distinct (user, day) in BookView and SearchQuery; returns pairs read."""
+    sources = (
+        BookView.objects.annotate(day=TruncDate('viewed_at')),
+        SearchQuery.objects.filter(user__isnull=False).annotate(day=TruncDate('searched_at')),
+    )
+    updates = {}
+    marked = 0
+    for source in sources:
+        days = {}
+        for user_id, day in source.order_by().values_list('user_id', 'day').distinct().iterator(chunk_size=batch_size):
+            days.setdefault(_day_key(day), set()).add(user_id)
+            marked += 1
+            if marked % batch_size == 0:
+                _day_bits(days, updates)
+                days = {}
+        if days:
+            _day_bits(days, updates)
+    # ORed in at the end: counts never dip, and bits without raw rows behind them are kept
+    if updates:
+        _merge_bits(updates)
+    return marked
+
+
+def count_active_users(start_day=None, end_day=None):
+    """Distinct users active from start_day to end_day (default today) inclusive, or ever."""
+    if start_day is None:
+        bitmaps = ActiveUserBitmap.objects.filter(key=ALL_TIME_KEY)
+    else:
+        end_day = end_day or timezone.localdate()
+        # ISO days sort as strings; 'all' sorts after every day
+        bitmaps = ActiveUserBitmap.objects.filter(key__gte=_day_key(start_day), key__lte=_day_key(end_day))
+    active = 0
+    for bits in bitmaps.values_list('bits', flat=True):
+        active |= _to_int(bits)
+    return active.bit_count()
+
+
+def get_active_user_counts(today=None):
+    """DAU, WAU and MAU as of today, plus all-time unique users, from one query."""
+    today = today or timezone.localdate()
+    # The last 30 day keys and 'all' are exactly the keys >= 30 days ago
+    bitmaps = dict(
+        ActiveUserBitmap.objects.filter(key__gte=_day_key(today - timedelta(days=29)))
+        .values_list('key', 'bits')
+    )
+
+    def count(days):
+        active = 0
+        for offset in range(days):
+            active |= _to_int(bitmaps.get(_day_key(today - timedelta(days=offset)), b''))
+        return active.bit_count()
+
+    return {
+        'active_users_1d': count(1),
+        'active_users_7d': count(7),
+        'active_users_30d': count(30),
+        'total_users': _to_int(bitmaps.get(ALL_TIME_KEY, b'')).bit_count(),
+    }
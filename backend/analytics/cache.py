@@ -0,0 +1,70 @@
+"""Stale-while-revalidate cache for admin analytics sections, refreshed single-flight."""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_FRESH_SECONDS = 60
+ANALYTICS_STALE_TIMEOUT = 60 * 60
+# Longer than any rebuild; a crashed refresher only blocks refreshes this long
+ANALYTICS_REFRESH_LOCK_TIMEOUT = 60 * 2
+ANALYTICS_MISS_WAIT = 5.0
+ANALYTICS_MISS_POLL = 0.1
+
+
+def _lock_key(key):
+    return f'{key}:refreshing'
+
+
+def _build(key, builder):
+    data = builder()
+    generated_at = timezone.now()
+    cache.set(key, (data, generated_at), ANALYTICS_STALE_TIMEOUT)
+    return data, generated_at
+
+
+def _refresh(key, builder):
+    try:
+        _build(key, builder)
+    except Exception:
+        logger.exception('Analytics cache: failed to refresh %s', key)
+    finally:
+        cache.delete(_lock_key(key))
+        # Not a request, so nothing else closes the thread's connection
+        connection.close()
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + ANALYTICS_MISS_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(ANALYTICS_MISS_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_refresh(key, builder):
+    """(data, generated_at) for key; stale entries are served while one caller rebuilds them."""
+    entry = cache.get(key)
+    if entry is not None:
+        data, generated_at = entry
+        if (timezone.now() - generated_at).total_seconds() >= ANALYTICS_FRESH_SECONDS \
+                and cache.add(_lock_key(key), 1, timeout=ANALYTICS_REFRESH_LOCK_TIMEOUT):
+            threading.Thread(
+                target=_refresh, args=(key, builder), name='analytics-refresh', daemon=True
+            ).start()
+        return entry
+
+    if cache.add(_lock_key(key), 1, timeout=ANALYTICS_REFRESH_LOCK_TIMEOUT):
+        try:
+            return _build(key, builder)
+        finally:
+            cache.delete(_lock_key(key))
+    # Another worker is building it: wait up to ANALYTICS_MISS_WAIT for its result
+    return _wait_for(key) or _build(key, builder)
@@ -0,0 +1,197 @@
+"""Asynchronous, batched ingestion of analytics events submitted after the response."""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from .search_terms import write_searches
+
+logger = logging.getLogger(__name__)
+
+INGEST_QUEUE_SIZE = 10000
+INGEST_BATCH_SIZE = 500
+INGEST_FLUSH_INTERVAL = 2.0
+INGEST_WRITE_ATTEMPTS = 2
+INGEST_SHUTDOWN_TIMEOUT = 10.0
+# Published to the default cache for the admin overview (see get_ingest_stats)
+INGEST_COUNTERS = ('enqueued', 'written', 'dropped', 'failed')
+
+# Wakes the flusher at shutdown
+_STOP = object()
+
+SEARCH = 'search'
+
+# kind -> writer taking a list of event payloads
+EVENT_WRITERS = {
+    SEARCH: write_searches,
+}
+
+
+def _counter_key(name):
+    return f'analytics:ingest:{name}'
+
+
+def group_events(events):
+    """{kind: [payload]} for (kind, payload) events."""
+    by_kind = {}
+    for kind, payload in events:
+        by_kind.setdefault(kind, []).append(payload)
+    return by_kind
+
+
+class EventIngestor:
+    """Bounded in-process queue drained by a background flusher thread."""
+
+    def __init__(self, maxsize=INGEST_QUEUE_SIZE, batch_size=INGEST_BATCH_SIZE, interval=INGEST_FLUSH_INTERVAL):
+        self.queue = queue.Queue(maxsize)
+        self.batch_size = batch_size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._counts = Counter()
+
+    def submit(self, kind, payload):
+        """Queue an event without blocking. Returns False if it was dropped."""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((kind, payload))
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def flush(self):
+        """Write everything queued so far in the calling thread."""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    event = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is not _STOP:
+                    batch.append(event)
+            if not batch:
+                break
+            self._write(batch)
+        self._publish_counts()
+
+    def shutdown(self, timeout=INGEST_SHUTDOWN_TIMEOUT):
+        """Stop the flusher and write what is left; only a hard kill loses queued events."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                self.queue.put_nowait(_STOP)
+            except queue.Full:
+                pass  # The flusher is busy and sees _stopping after its current batch
+            # Let it finish the batch it already took off the queue
+            thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self):
+        # Also restarts the flusher in a forked worker, where the parent's thread does not exist
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='analytics-ingest', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+            self._publish_counts()
+
+    def _next_batch(self):
+        """Wait for a first event, then collect until the batch is full or the interval passes."""
+        try:
+            event = self.queue.get(timeout=self.interval)
+        except queue.Empty:
+            return []
+        if event is _STOP:
+            return []
+        batch = [event]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is _STOP:
+                break
+            batch.append(event)
+        return batch
+
+    def _write(self, batch):
+        try:
+            for kind, payloads in group_events(batch).items():
+                self._write_kind(kind, payloads)
+        finally:
+            # The flusher is not a request, so nothing else closes its connection
+            if threading.current_thread() is self._thread:
+                connection.close()
+
+    def _write_kind(self, kind, payloads):
+        # Writers are atomic, so a failed batch can be written again as a whole
+        for attempt in range(1, INGEST_WRITE_ATTEMPTS + 1):
+            try:
+                EVENT_WRITERS[kind](payloads)
+            except Exception:
+                if attempt < INGEST_WRITE_ATTEMPTS:
+                    logger.warning('Analytics ingest: retrying %d event(s)', len(payloads), exc_info=True)
+                    # A dropped connection is the usual cause: retry on a fresh one
+                    connection.close()
+                    continue
+                logger.exception('Analytics ingest: failed to write %d event(s)', len(payloads))
+                self._count('failed', len(payloads))
+            else:
+                self._count('written', len(payloads))
+            return
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+    def _publish_counts(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        dropped = counts.get('dropped')
+        if dropped:
+            logger.warning('Analytics ingest: dropped %d event(s), queue full', dropped)
+        try:
+            for name, n in counts.items():
+                key = _counter_key(name)
+                cache.add(key, 0, timeout=None)
+                cache.incr(key, n)
+        except Exception:
+            logger.exception('Analytics ingest: failed to publish counters')
+
+
+ingestor = EventIngestor()
+atexit.register(ingestor.shutdown)
+
+
+def submit_search(query, user_id=None, searched_at=None):
+    return ingestor.submit(SEARCH, (user_id, query, searched_at or timezone.now()))
+
+
+def get_ingest_stats():
+    """Counters across all workers, plus the events waiting in this worker's queue."""
+    values = cache.get_many([_counter_key(name) for name in INGEST_COUNTERS])
+    stats = {name: values.get(_counter_key(name), 0) for name in INGEST_COUNTERS}
+    stats['queued'] = ingestor.queue.qsize()
+    return stats
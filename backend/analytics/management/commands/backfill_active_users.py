@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from analytics.active_users import BACKFILL_BATCH_SIZE, backfill_active_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Set the active-user bits of every (user, day) in BookView and SearchQuery, ORed into "
+        "the stored bitmaps in one transaction. Migration 0006 already did this on deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        marked = backfill_active_users(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Marked {marked} daily active user(s)."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from analytics.view_buffer import flush_view_buffer
+
+
+class Command(BaseCommand):
+    help = "Apply buffered book views to BookView and Book.view_count. Schedule every minute."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Events applied per round.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            flushed = flush_view_buffer(max_events=options['batch_size'])
+            if not flushed:
+                break
+            total += flushed
+        self.stdout.write(self.style.SUCCESS(f"Flushed {total} buffered view(s)."))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from analytics.partitions import (
+    PARTITION_MONTHS_AHEAD, PARTITIONED_MODELS, add_months, detach_partitions, ensure_partitions,
+    get_partitioned_tables, month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create monthly partitions ahead for BookView, SearchQuery and ReadingSession, move rows "
+        "out of the default partitions and, with --retain-months, detach older partitions. "
+        "Schedule daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                            help='Months of empty partitions to keep ahead of now.')
+        parser.add_argument('--retain-months', type=int,
+                            help='Detach partitions of months before the last N (default: keep all).')
+        parser.add_argument('--drop', action='store_true',
+                            help='Drop detached partitions instead of leaving them to archive.')
+        parser.add_argument('--model', action='append', choices=sorted(PARTITIONED_MODELS),
+                            help='Only maintain this model (repeatable; default: all).')
+
+    def handle(self, *args, **options):
+        if options['retain_months'] is not None and options['retain_months'] < 1:
+            raise CommandError('--retain-months must be at least 1.')
+        if options['drop'] and options['retain_months'] is None:
+            raise CommandError('--drop needs --retain-months.')
+
+        for label, table, column in get_partitioned_tables():
+            if options['model'] and label not in options['model']:
+                continue
+            with connection.cursor() as cursor:
+                created = ensure_partitions(cursor, table, column, options['months_ahead'])
+                detached = []
+                if options['retain_months'] is not None:
+                    before = add_months(month_start(timezone.now()), 1 - options['retain_months'])
+                    detached = detach_partitions(cursor, table, before, drop=options['drop'])
+            for name in created:
+                self.stdout.write(f"Created {name}")
+            for name in detached:
+                self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} {name}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{label}: {len(created)} partition(s) created, {len(detached)} detached."
+            ))
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from analytics.models import SearchQuery
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete raw SearchQuery rows older than --days. Their counts live on in SearchTermDay, "
+        "which is updated as each search is logged. Schedule daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Raw rows to keep, in days.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        table = SearchQuery._meta.db_table
+        total = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT id FROM {table} WHERE searched_at < %s ORDER BY searched_at LIMIT %s
+                    )
+                """, [cutoff, options['batch_size']])
+                deleted = cursor.rowcount
+            total += deleted
+            if deleted < options['batch_size']:
+                break
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} search quer{'y' if total == 1 else 'ies'} older than {cutoff:%Y-%m-%d}."))
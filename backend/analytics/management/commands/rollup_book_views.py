@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from analytics.rollups import rollup_book_views
+
+
+class Command(BaseCommand):
+    help = "Roll BookView rows up into hourly BookViewHour buckets. Schedule every few minutes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Recompute from this date or datetime (default: catch up from the watermark).')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                day = parse_date(options['since'])
+                if day is None:
+                    raise CommandError(f"Invalid --since value: {options['since']}")
+                since = datetime.combine(day, datetime.min.time())
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        written = rollup_book_views(since)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} hourly view bucket(s)."))
@@ -1,13 +1,13 @@
 from django.utils.deprecation import MiddlewareMixin
 
-from .models import SearchQuery
+from .ingest import submit_search
 
 
 class AnalyticsMiddleware(MiddlewareMixin):
     """Middleware to log analytics events"""
     
-    def process_request(self, request):
-        """Process incoming request for analytics"""
+    def process_response(self, request, response):
+        """Queue analytics events once the view has run (and DRF has authenticated the user)"""
         skip_paths = [
             '/admin/',
             '/static/',
@@ -17,15 +17,15 @@ class AnalyticsMiddleware(MiddlewareMixin):
         ]
         
         if any(request.path.startswith(path) for path in skip_paths):
-            return None
+            return response
         
-        if request.path.startswith('/api/catalog/books') and request.method == 'GET':
+        # Only searches that were answered: invalid params and server errors are not searches
+        if request.path.startswith('/api/catalog/books') and request.method == 'GET' \
+                and 200 <= response.status_code < 300:
             query = request.GET.get('search') or request.GET.get('query') or ''
             query = query.strip()
             if query:
-                SearchQuery.objects.create(
-                    user=request.user if getattr(request, 'user', None) and request.user.is_authenticated else None,
-                    query=query
-                )
+                user = getattr(request, 'user', None)
+                submit_search(query, user_id=user.pk if user is not None and user.is_authenticated else None)
         
-        return None
+        return response
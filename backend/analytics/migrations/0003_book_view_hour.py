@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_bookmark_unique'),
+        ('analytics', '0002_bookview_viewed_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookViewHour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text='Start of the hour bucket.')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_users', models.PositiveIntegerField(default=0, help_text='Distinct viewers of the book in the hour.')),
+            ],
+            options={
+                'verbose_name': 'Book View Hour',
+                'verbose_name_plural': 'Book View Hours',
+                'ordering': ['-hour'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bookview',
+            index=models.Index(fields=['viewed_at'], name='analytics_b_viewed__076b97_idx'),
+        ),
+        migrations.AddField(
+            model_name='bookviewhour',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_hours', to='catalog.book'),
+        ),
+        migrations.AddIndex(
+            model_name='bookviewhour',
+            index=models.Index(fields=['hour'], name='analytics_b_hour_ef4e10_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='bookviewhour',
+            unique_together={('book', 'hour')},
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:54
+
+from collections import Counter
+import re
+import unicodedata
+
+from django.db import migrations, models
+from django.utils import timezone
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_term(text):
+    # Frozen copy of catalog.search.normalize_term as of this migration
+    text = unicodedata.normalize('NFKC', text or '')
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+def backfill_search_terms(apps, schema_editor):
+    SearchQuery = apps.get_model('analytics', 'SearchQuery')
+    SearchTermDay = apps.get_model('analytics', 'SearchTermDay')
+
+    counts = Counter()
+    for query, searched_at in SearchQuery.objects.values_list('query', 'searched_at').iterator(chunk_size=5000):
+        term = normalize_term(query)[:255]
+        if term:
+            counts[term, timezone.localtime(searched_at).date()] += 1
+    SearchTermDay.objects.bulk_create(
+        [SearchTermDay(term=term, day=day, count=n) for (term, day), n in counts.items()],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_book_view_hour'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTermDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(help_text='Normalized search term (catalog.search.normalize_term).', max_length=255)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Search Term Day',
+                'verbose_name_plural': 'Search Term Days',
+                'ordering': ['-day', '-count'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchquery',
+            index=models.Index(fields=['searched_at'], name='analytics_s_searche_f1b77a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchtermday',
+            index=models.Index(fields=['day'], include=('term', 'count'), name='analytics_term_day_covering'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchtermday',
+            unique_together={('term', 'day')},
+        ),
+        migrations.RunPython(backfill_search_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import TruncDate
+
+
+def backfill_active_users(apps, schema_editor):
+    # Frozen copy of analytics.active_users at the time of this migration
+    BookView = apps.get_model('analytics', 'BookView')
+    SearchQuery = apps.get_model('analytics', 'SearchQuery')
+    ActiveUserIndex = apps.get_model('analytics', 'ActiveUserIndex')
+    ActiveUserBitmap = apps.get_model('analytics', 'ActiveUserBitmap')
+
+    days = {}
+    for source in (
+        BookView.objects.annotate(day=TruncDate('viewed_at')),
+        SearchQuery.objects.filter(user__isnull=False).annotate(day=TruncDate('searched_at')),
+    ):
+        for user_id, day in source.order_by().values_list('user_id', 'day').distinct().iterator(chunk_size=10000):
+            days.setdefault(day.isoformat(), set()).add(user_id)
+    if not days:
+        return
+
+    user_ids = set().union(*days.values())
+    ActiveUserIndex.objects.bulk_create(
+        [ActiveUserIndex(user_id=user_id) for user_id in user_ids], batch_size=5000
+    )
+    positions = dict(ActiveUserIndex.objects.values_list('user_id', 'pk'))
+    bitmaps = {'all': 0}
+    for key, day_users in days.items():
+        bits = 0
+        for user_id in day_users:
+            bits |= 1 << positions[user_id]
+        bitmaps[key] = bits
+        bitmaps['all'] |= bits
+    ActiveUserBitmap.objects.bulk_create([
+        ActiveUserBitmap(key=key, bits=bits.to_bytes((bits.bit_length() + 7) // 8, 'little'))
+        for key, bits in bitmaps.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('analytics', '0005_searchquery_searched_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActiveUserBitmap',
+            fields=[
+                ('key', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('bits', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Active User Bitmap',
+                'verbose_name_plural': 'Active User Bitmaps',
+            },
+        ),
+        migrations.CreateModel(
+            name='ActiveUserIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='active_user_index', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Active User Index',
+                'verbose_name_plural': 'Active User Indexes',
+            },
+        ),
+        migrations.RunPython(backfill_active_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:40
+
+from django.db import migrations
+
+from analytics.migrations._partitioning import partition_table, unpartition_table
+
+PARTITIONED = [
+    ('analytics_bookview', 'viewed_at'),
+    ('analytics_searchquery', 'searched_at'),
+]
+
+
+def partition_tables(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED:
+            partition_table(cursor, table, column)
+
+
+def unpartition_tables(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table, _ in PARTITIONED:
+            unpartition_table(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0006_active_user_bitmaps'),
+    ]
+
+    # Monthly range partitions (see analytics.partitions), with the DDL frozen in
+    # analytics.migrations._partitioning. The model state does not change.
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
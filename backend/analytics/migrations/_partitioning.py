@@ -0,0 +1,118 @@
+"""Frozen copy of the partitioning DDL for analytics 0007 and reading 0010: do not change."""
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+
+PARTITION_MONTHS_AHEAD = 3
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _bounds(month):
+    return f"'{month.isoformat()}'", f"'{add_months(month, 1).isoformat()}'"
+
+
+def _strip_table(cursor, table):
+    """Drop the primary key, indexes and foreign keys of `table`; returns the statements recreating them."""
+    cursor.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid), c.conname
+        FROM pg_index i
+        LEFT JOIN pg_constraint c
+            ON c.conindid = i.indexrelid AND c.conrelid = i.indrelid AND c.contype = 'p'
+        WHERE i.indrelid = %s::regclass
+    """, [table])
+    indexes = cursor.fetchall()
+    cursor.execute("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+    """, [table])
+    foreign_keys = cursor.fetchall()
+
+    recreate = []
+    for index, definition, constraint in indexes:
+        if constraint:
+            # The primary key, rebuilt by the caller
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {constraint}')
+        else:
+            cursor.execute(f'DROP INDEX {index}')
+            # Definitions on a partitioned table are ON ONLY, which would skip the partitions
+            recreate.append(definition.replace(' ON ONLY ', ' ON '))
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+        recreate.append(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    return recreate
+
+
+def _rebuild_table(cursor, table, primary_key, partition_by=None, create_partitions=None):
+    """Rebuild `table` in place as a partitioned or a plain table, keeping rows and indexes."""
+    old = f'{table}_old'
+    cursor.execute("""
+        SELECT pg_get_serial_sequence(%s, 'id'), attidentity != ''
+        FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'
+    """, [table, table])
+    sequence, identity = cursor.fetchone()
+
+    recreate = _strip_table(cursor, table)
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    cursor.execute(f"""
+        CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS)
+        {f'PARTITION BY RANGE ({partition_by})' if partition_by else ''}
+    """)
+    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({", ".join(primary_key)})')
+    if create_partitions:
+        create_partitions()
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+
+    if sequence and identity:
+        # INCLUDING IDENTITY created a new sequence: continue after the copied ids
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        cursor.execute(f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)",
+                       [cursor.fetchone()[0]])
+    elif sequence:
+        # The copied serial default still uses the old table's sequence: hand it over before
+        # the old table (its owner) is dropped
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+    cursor.execute(f'DROP TABLE {old}')
+    for statement in recreate:
+        cursor.execute(statement)
+    cursor.execute(f'ANALYZE {table}')
+
+
+def partition_table(cursor, table, column, months_ahead=PARTITION_MONTHS_AHEAD):
+    """Convert a plain table into monthly partitions on `column` plus a default one, in a transaction."""
+    def create_partitions():
+        cursor.execute(f'SELECT MIN({column}) FROM {table}_old')
+        first = cursor.fetchone()[0]
+        month = month_start(first or timezone.now())
+        last = add_months(month_start(timezone.now()), months_ahead)
+        while month <= last:
+            lower, upper = _bounds(month)
+            cursor.execute(f"""
+                CREATE TABLE {partition_name(table, month)} PARTITION OF {table}
+                FOR VALUES FROM ({lower}) TO ({upper})
+            """)
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE {default_partition_name(table)} PARTITION OF {table} DEFAULT')
+
+    _rebuild_table(cursor, table, ['id', column], partition_by=column, create_partitions=create_partitions)
+
+
+def unpartition_table(cursor, table):
+    """Convert a partitioned table back into a plain one. Detached partitions are left alone."""
+    _rebuild_table(cursor, table, ['id'])
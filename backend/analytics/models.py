@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 # Get the custom User model (assuming it's in the accounts app)
@@ -22,7 +23,8 @@ class BookView(models.Model):
         related_name='views',
         verbose_name='Book'
     )
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: views are written in bulk by analytics.view_buffer with their original time
+    viewed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         verbose_name = "Book View"
@@ -30,10 +32,38 @@ class BookView(models.Model):
         ordering = ['-viewed_at']
         # You may want to ensure a user can only have one "latest" view recorded
         # For simple analytics, we allow multiple views.
+        indexes = [
+            # Range reads of the tail not yet rolled up into BookViewHour
+            models.Index(fields=['viewed_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.email} viewed {self.book.title}"
 
+
+class BookViewHour(models.Model):
+    """Hourly BookView rollup per book, maintained by analytics.rollups."""
+    book = models.ForeignKey(
+        'catalog.Book',
+        on_delete=models.CASCADE,
+        related_name='view_hours'
+    )
+    hour = models.DateTimeField(help_text="Start of the hour bucket.")
+    views = models.PositiveIntegerField(default=0)
+    unique_users = models.PositiveIntegerField(default=0, help_text="Distinct viewers of the book in the hour.")
+
+    class Meta:
+        verbose_name = "Book View Hour"
+        verbose_name_plural = "Book View Hours"
+        ordering = ['-hour']
+        unique_together = ('book', 'hour')
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+
+    def __str__(self):
+        return f"Book {self.book_id} @ {self.hour}: {self.views} view(s)"
+
 class SearchQuery(models.Model):
     """Tracks user search terms."""
     # If the user is deleted, the search query is kept, but the user field is set to NULL (SET_NULL)
@@ -45,13 +75,71 @@ class SearchQuery(models.Model):
         related_name='search_queries'
     )
     query = models.CharField(max_length=255, help_text="The actual search term.")
-    searched_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: searches are written in batches by analytics.ingest with their original time
+    searched_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         verbose_name = "Search Query"
         verbose_name_plural = "Search Queries"
         ordering = ['-searched_at']
+        indexes = [
+            # Retention pruning (prune_search_queries)
+            models.Index(fields=['searched_at']),
+        ]
 
     def __str__(self):
         user_info = self.user.email if self.user else 'Anonymous'
-        return f"'{self.query}' by {user_info}"
\ No newline at end of file
+        return f"'{self.query}' by {user_info}"
+
+
+class SearchTermDay(models.Model):
+    """Daily count per normalized search term, maintained on ingest (see analytics.search_terms)."""
+    term = models.CharField(max_length=255, help_text="Normalized search term (catalog.search.normalize_term).")
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Search Term Day"
+        verbose_name_plural = "Search Term Days"
+        ordering = ['-day', '-count']
+        unique_together = ('term', 'day')
+        indexes = [
+            # Top terms for a period: index-only scan over the day range
+            models.Index(fields=['day'], include=['term', 'count'], name='analytics_term_day_covering'),
+        ]
+
+    def __str__(self):
+        return f"'{self.term}' x{self.count} on {self.day}"
+
+
+class ActiveUserIndex(models.Model):
+    """Dense bit position for each user in the active-user bitmaps (the id is the position)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='active_user_index'
+    )
+
+    class Meta:
+        verbose_name = "Active User Index"
+        verbose_name_plural = "Active User Indexes"
+
+    def __str__(self):
+        return f"{self.user_id} -> bit {self.pk}"
+
+
+class ActiveUserBitmap(models.Model):
+    """
+    Users active in a period as a bitmap over ActiveUserIndex positions (see analytics.active_users).
+    key is an ISO day ('2026-10-16') or 'all' for every user ever active.
+    """
+    key = models.CharField(max_length=10, primary_key=True)
+    bits = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Active User Bitmap"
+        verbose_name_plural = "Active User Bitmaps"
+
+    def __str__(self):
+        return f"Active users {self.key}"
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""Sections of the admin analytics overview, each cached on its own per period."""
+from datetime import timedelta
+from functools import partial
+
+from django.db.models import Count
+from django.utils import timezone
+
+from catalog.models import Book, BookLike, Category
+from .active_users import get_active_user_counts
+from .cache import get_or_refresh
+from .rollups import count_views, get_rollup_watermark
+from .search_terms import get_top_search_terms
+
+OVERVIEW_PERIODS = {'today', 'week', 'month', 'year'}
+
+
+def get_period_date_range(period: str):
+    """Get start date based on period parameter"""
+    end_date = timezone.now()
+    if period == 'today':
+        start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif period == 'week':
+        start_date = end_date - timedelta(days=7)
+    elif period == 'year':
+        start_date = end_date - timedelta(days=365)
+    else:  # 'month' default
+        start_date = end_date - timedelta(days=30)
+    return start_date, end_date
+
+
+def build_most_viewed(period):
+    # View counts come from the hourly rollup plus the raw tail (see analytics.rollups)
+    viewed_start_date, _ = get_period_date_range(period)
+
+    book_view_counts = count_views(viewed_start_date, group='book')
+    top_viewed = sorted(book_view_counts.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+    # Optimize: Fetch all books in one query
+    books_map = Book.objects.select_related('author').in_bulk([book_id for book_id, _ in top_viewed])
+
+    most_viewed_books = []
+    for book_id, period_view_count in top_viewed:
+        book = books_map.get(book_id)
+        if book:
+            most_viewed_books.append({
+                'id': str(book.pk),
+                'title': book.title,
+                'author': book.author.name if book.author else 'Unknown',
+                'view_count': period_view_count,
+                'like_count': book.like_count
+            })
+    return {'most_read_books': most_viewed_books}
+
+
+def build_most_liked(period):
+    liked_start_date, _ = get_period_date_range(period)
+
+    # Optimize: Aggregate likes directly in DB
+    top_liked_qs = BookLike.objects.filter(
+        created_at__gte=liked_start_date
+    ).values('book').annotate(
+        like_count=Count('id')
+    ).order_by('-like_count')[:10]
+
+    liked_book_ids = [entry['book'] for entry in top_liked_qs]
+    liked_books_map = Book.objects.select_related('author').in_bulk(liked_book_ids)
+
+    most_liked_books = []
+    for entry in top_liked_qs:
+        book = liked_books_map.get(entry['book'])
+        if book and book.is_published:  # Ensure only published books
+            most_liked_books.append({
+                'id': str(book.pk),
+                'title': book.title,
+                'author': book.author.name if book.author else 'Unknown',
+                'like_count': entry['like_count']
+            })
+
+    # Category -> books -> likes, fetched with the books' categories prefetched
+    liked_in_period = BookLike.objects.filter(
+        created_at__gte=liked_start_date
+    ).select_related('book').prefetch_related('book__categories')
+
+    category_likes = {}
+    for like in liked_in_period:
+        if like.book:
+            for category in like.book.categories.all():
+                category_likes[category.name] = category_likes.get(category.name, 0) + 1
+
+    most_liked_categories = sorted(
+        category_likes.items(),
+        key=lambda x: x[1],
+        reverse=True
+    )[:10]
+    return {
+        'most_liked_books': most_liked_books,
+        'most_liked_categories': [
+            {'name': name, 'likes': likes} for name, likes in most_liked_categories
+        ],
+    }
+
+
+def build_reads(period):
+    reads_start_date, reads_end_date = get_period_date_range(period)
+    watermark = get_rollup_watermark()
+
+    reads_graph_data = []
+    if period == 'today':
+        # Hourly aggregation
+        hourly_counts = count_views(reads_start_date, group='hour', watermark=watermark)
+        counts_map = {
+            timezone.localtime(hour).hour: count for hour, count in hourly_counts.items()
+        }
+        # Fill all 24 hours
+        for i in range(24):
+            reads_graph_data.append({
+                'date': f"{i}:00",
+                'count': counts_map.get(i, 0)
+            })
+    else:
+        # Daily aggregation
+        daily_counts = count_views(reads_start_date, group='day', watermark=watermark)
+        counts_map = {day: count for day, count in daily_counts.items() if day}
+
+        # Fill days in range
+        days_to_show = min((reads_end_date - reads_start_date).days + 1, 365)
+        for i in range(days_to_show):
+            date = (reads_start_date + timedelta(days=i)).date()
+            reads_graph_data.append({
+                'date': date.strftime('%Y-%m-%d'),
+                'count': counts_map.get(date, 0)
+            })
+
+    # Reads per hour of day (peak usage in the period)
+    reads_per_hour_counts = count_views(reads_start_date, group='hour_of_day', watermark=watermark)
+    return {
+        'reads_per_day': reads_graph_data,
+        'reads_per_hour': [
+            {'hour': hour, 'count': count}
+            for hour, count in sorted(reads_per_hour_counts.items())
+        ],
+        'total_reads_period': count_views(reads_start_date, watermark=watermark),
+    }
+
+
+def build_top_search_terms(period):
+    search_start_date, _ = get_period_date_range(period)
+    # One grouped query over the normalized daily term counters (analytics.search_terms)
+    return {
+        'top_search_terms': [
+            {'term': term, 'count': count} for term, count in get_top_search_terms(search_start_date)
+        ],
+    }
+
+
+def build_totals(period=None):
+    return {
+        'total_books': Book.objects.filter(is_published=True).count(),
+        'total_categories': Category.objects.count(),
+        'total_reads': count_views(),
+        # DAU/WAU/MAU and all-time users from the daily bitmaps (analytics.active_users)
+        **get_active_user_counts(),
+    }
+
+
+# section -> (builder, overview period parameter or None)
+OVERVIEW_SECTIONS = {
+    'most_viewed': (build_most_viewed, 'viewed_period'),
+    'most_liked': (build_most_liked, 'liked_period'),
+    'reads': (build_reads, 'reads_period'),
+    'search_terms': (build_top_search_terms, 'search_period'),
+    'totals': (build_totals, None),
+}
+
+
+def get_overview_sections(periods):
+    """(merged section data, oldest generated_at) for {period parameter: period}."""
+    data = {}
+    oldest = None
+    for section, (builder, param) in OVERVIEW_SECTIONS.items():
+        period = periods.get(param) if param else None
+        # Like get_period_date_range(), unknown periods are served as 'month'
+        if param and period not in OVERVIEW_PERIODS:
+            period = 'month'
+        key = f'analytics:overview:{section}:{period or "all"}'
+        section_data, generated_at = get_or_refresh(key, partial(builder, period))
+        data.update(section_data)
+        if oldest is None or generated_at < oldest:
+            oldest = generated_at
+    return data, oldest
@@ -0,0 +1,145 @@
+"""Monthly (UTC) range partitioning of the append-only event tables."""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.apps import apps
+from django.db import transaction
+from django.utils import timezone
+
+PARTITION_MONTHS_AHEAD = 3
+
+# model label -> partition column. The primary key is (id, column), so a lookup by id alone
+# probes every attached partition; ReadingSession ids carry their start time
+# (reading.models.session_uuid) so its hot paths add started_at bounds.
+PARTITIONED_MODELS = {
+    'analytics.BookView': 'viewed_at',
+    'analytics.SearchQuery': 'searched_at',
+    'reading.ReadingSession': 'started_at',
+}
+
+
+def get_partitioned_tables():
+    """[(model label, table, column)] for PARTITIONED_MODELS."""
+    return [
+        (label, apps.get_model(label)._meta.db_table, column)
+        for label, column in PARTITIONED_MODELS.items()
+    ]
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _bounds(month):
+    return f"'{month.isoformat()}'", f"'{add_months(month, 1).isoformat()}'"
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def _is_attached(cursor, table, name):
+    cursor.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(%s) AND inhparent = %s::regclass
+        )
+    """, [name, table])
+    return cursor.fetchone()[0]
+
+
+def create_partition(cursor, table, column, month):
+    """Create the partition for `month` from the default partition's rows; True if it was created."""
+    # A detached month stays detached: its late rows go to its archive table instead
+    name = partition_name(table, month)
+    if _is_attached(cursor, table, name):
+        return False
+    lower, upper = _bounds(month)
+    default = default_partition_name(table)
+    if _table_exists(cursor, name):
+        cursor.execute(f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE {column} >= {lower} AND {column} < {upper} RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """)
+        return False
+    with transaction.atomic():
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= {lower} AND {column} < {upper})')
+        if not cursor.fetchone()[0]:
+            cursor.execute(f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ({lower}) TO ({upper})')
+            return True
+        cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE {column} >= {lower} AND {column} < {upper} RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """)
+        cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})')
+    return True
+
+
+def get_partition_months(cursor, table):
+    """Months of the monthly partitions currently attached to `table`, oldest first."""
+    cursor.execute("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+    """, [table])
+    pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})(\d{{2}})$')
+    months = []
+    for (name,) in cursor.fetchall():
+        match = pattern.match(name)
+        if match:
+            months.append(datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc))
+    return sorted(months)
+
+
+def get_oldest_partition_start(cursor, table):
+    """Start of the oldest attached monthly partition (None if there is none)."""
+    months = get_partition_months(cursor, table)
+    return months[0] if months else None
+
+
+def ensure_partitions(cursor, table, column, months_ahead=PARTITION_MONTHS_AHEAD):
+    """Create partitions up to months_ahead and for every month in the default partition; returns names."""
+    default = default_partition_name(table)
+    if not _table_exists(cursor, default):
+        cursor.execute(f'CREATE TABLE {default} PARTITION OF {table} DEFAULT')
+    cursor.execute(f"SELECT DISTINCT date_trunc('month', {column}, 'UTC') FROM {default}")
+    months = {month_start(month) for (month,) in cursor.fetchall()}
+    current = month_start(timezone.now())
+    months.update(add_months(current, n) for n in range(months_ahead + 1))
+    return [
+        partition_name(table, month)
+        for month in sorted(months)
+        if create_partition(cursor, table, column, month)
+    ]
+
+
+def detach_partitions(cursor, table, before, drop=False):
+    """Detach (and optionally drop) the partitions ending on or before `before`; returns names."""
+    detached = []
+    for month in get_partition_months(cursor, table):
+        if add_months(month, 1) > before:
+            break
+        name = partition_name(table, month)
+        cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+        if drop:
+            cursor.execute(f'DROP TABLE {name}')
+        detached.append(name)
+    return detached
@@ -0,0 +1,120 @@
+"""Hourly BookView rollups (BookViewHour), recomputed whole hours at a time and idempotent."""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import ExtractHour, TruncDate, TruncHour
+from django.utils import timezone
+
+from .models import BookView, BookViewHour
+from .partitions import get_oldest_partition_start
+from .view_buffer import VIEW_EVENT_TIMEOUT, VIEW_WRITE_GRACE
+
+ROLLUP_LATENESS = timedelta(minutes=15)
+# Buffered views reach BookView up to VIEW_EVENT_TIMEOUT after they happened
+ROLLUP_REWIND = timedelta(seconds=VIEW_EVENT_TIMEOUT + VIEW_WRITE_GRACE)
+ROLLUP_CHUNK = timedelta(days=1)
+# pg_advisory_xact_lock key serializing overlapping runs
+ROLLUP_LOCK_ID = 0x726f6c6c  # 'roll'
+
+# group name -> (rollup expression, raw expression)
+VIEW_GROUPS = {
+    'book': (F('book_id'), F('book_id')),
+    'hour': (TruncHour('hour'), TruncHour('viewed_at')),
+    'day': (TruncDate('hour'), TruncDate('viewed_at')),
+    'hour_of_day': (ExtractHour('hour'), ExtractHour('viewed_at')),
+}
+
+
+def floor_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def get_rollup_watermark():
+    """End of the last rolled-up hour (None before the first run)."""
+    last = BookViewHour.objects.aggregate(last=Max('hour'))['last']
+    return last + timedelta(hours=1) if last else None
+
+
+def _rollup_range(start, end):
+    hour_table = BookViewHour._meta.db_table
+    view_table = BookView._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Overlapping runs would both insert the same (book, hour) after their deletes: the
+        # second one waits here until the first commits, then replaces its buckets
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [ROLLUP_LOCK_ID])
+        # Replace the buckets outright: idempotent, and buckets whose views are gone disappear
+        cursor.execute(
+            f"DELETE FROM {hour_table} WHERE hour >= %(start)s AND hour < %(end)s",
+            {'start': start, 'end': end},
+        )
+        cursor.execute(f"""
+            INSERT INTO {hour_table} (book_id, hour, views, unique_users)
+            SELECT book_id, date_trunc('hour', viewed_at), COUNT(*), COUNT(DISTINCT user_id)
+            FROM {view_table}
+            WHERE viewed_at >= %(start)s AND viewed_at < %(end)s
+            GROUP BY book_id, date_trunc('hour', viewed_at)
+        """, {'start': start, 'end': end})
+        return cursor.rowcount
+
+
+def rollup_book_views(since=None):
+    """Roll up complete hours from `since` (default: rewound watermark) on; returns rows written."""
+    end = floor_hour(timezone.now() - ROLLUP_LATENESS)
+    if since is None:
+        watermark = get_rollup_watermark()
+        if watermark is not None:
+            since = watermark - ROLLUP_REWIND
+        else:
+            since = BookView.objects.aggregate(first=Min('viewed_at'))['first']
+            if since is None:
+                return 0
+    start = floor_hour(since)
+    # Raw rows of detached months are gone: recomputing their hours would delete the only counts left
+    with connection.cursor() as cursor:
+        oldest = get_oldest_partition_start(cursor, BookView._meta.db_table)
+    if oldest is not None and start < oldest:
+        start = oldest
+
+    written = 0
+    while start < end:
+        chunk_end = min(start + ROLLUP_CHUNK, end)
+        written += _rollup_range(start, chunk_end)
+        start = chunk_end
+    return written
+
+
+def count_views(start=None, group=None, watermark=None):
+    """BookView counts since `start`, as a total or {value: count} for a VIEW_GROUPS key."""
+    if watermark is None:
+        watermark = get_rollup_watermark()
+
+    rollup = BookViewHour.objects.none()
+    raw = BookView.objects.all()
+    if start is not None:
+        raw = raw.filter(viewed_at__gte=start)
+    # Whole hours in [start, watermark) come from the rollup; the partial first hour and the
+    # tail after the watermark from BookView
+    first_hour = None
+    if start is not None:
+        first_hour = floor_hour(start)
+        if first_hour < start:
+            first_hour += timedelta(hours=1)
+    if watermark is not None and (first_hour is None or first_hour < watermark):
+        rollup = BookViewHour.objects.filter(hour__lt=watermark)
+        tail = Q(viewed_at__gte=watermark)
+        if first_hour is not None:
+            rollup = rollup.filter(hour__gte=first_hour)
+            tail |= Q(viewed_at__lt=first_hour)
+        raw = raw.filter(tail)
+
+    if group is None:
+        return (rollup.aggregate(n=Sum('views'))['n'] or 0) + raw.count()
+
+    rollup_key, raw_key = VIEW_GROUPS[group]
+    counts = {}
+    for queryset, key, value in ((rollup, rollup_key, Sum('views')), (raw, raw_key, Count('id'))):
+        rows = queryset.order_by().annotate(key=key).values('key').annotate(n=value).values_list('key', 'n')
+        for key_value, n in rows:
+            counts[key_value] = counts.get(key_value, 0) + n
+    return counts
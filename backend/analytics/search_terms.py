@@ -0,0 +1,80 @@
+"""Search term counters (SearchTermDay), bumped with one upsert per logged batch."""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from catalog.search import normalize_term
+from .active_users import mark_active
+from .models import SearchQuery, SearchTermDay
+
+MAX_TERM_LENGTH = SearchTermDay._meta.get_field('term').max_length
+
+
+def normalize_search_term(query):
+    return normalize_term(query)[:MAX_TERM_LENGTH]
+
+
+def write_searches(searches):
+    """Write (user_id, query, searched_at) searches: raw rows, term counters and active-user bits."""
+    max_query_length = SearchQuery._meta.get_field('query').max_length
+    searches = [(user_id, query, searched_at) for user_id, query, searched_at in searches
+                if normalize_search_term(query)]
+    if not searches:
+        return 0
+
+    user_ids = {user_id for user_id, _, _ in searches if user_id is not None}
+    live_users = set(
+        get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+    ) if user_ids else set()
+
+    counts = Counter(
+        (normalize_search_term(query), timezone.localtime(searched_at).date())
+        for _, query, searched_at in searches
+    )
+    with transaction.atomic():
+        SearchQuery.objects.bulk_create([
+            SearchQuery(
+                user_id=user_id if user_id in live_users else None,
+                query=query[:max_query_length],
+                searched_at=searched_at,
+            )
+            for user_id, query, searched_at in searches
+        ])
+        increment_search_terms(counts)
+        mark_active(
+            (user_id, timezone.localtime(searched_at).date())
+            for user_id, _, searched_at in searches if user_id in live_users
+        )
+    return len(searches)
+
+
+def increment_search_terms(counts):
+    """Add {(term, day): n} to the counters in one statement."""
+    if not counts:
+        return
+    values = []
+    params = []
+    for (term, day), n in counts.items():
+        values.append('(%s, %s::date, %s)')
+        params.extend([term, day, n])
+    table = SearchTermDay._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {table} AS t (term, day, count)
+            VALUES {', '.join(values)}
+            ON CONFLICT (term, day) DO UPDATE SET count = t.count + EXCLUDED.count
+        """, params)
+
+
+def get_top_search_terms(start_date, limit=10):
+    """[(term, count)] for searches since start_date (whole days), most frequent first."""
+    return list(
+        SearchTermDay.objects.filter(day__gte=timezone.localtime(start_date).date())
+        .values('term')
+        .annotate(total=Sum('count'))
+        .order_by('-total', 'term')
+        .values_list('term', 'total')[:limit]
+    )
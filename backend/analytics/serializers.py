@@ -7,7 +7,9 @@ class OverviewSerializer(serializers.Serializer):
     total_users = serializers.IntegerField()
     total_reads = serializers.IntegerField()
     total_reads_period = serializers.IntegerField(required=False)
+    active_users_1d = serializers.IntegerField(required=False)
     active_users_7d = serializers.IntegerField()
+    active_users_30d = serializers.IntegerField(required=False)
     period = serializers.CharField(required=False)
 
 
@@ -71,6 +73,14 @@ class UserReadingStatsSerializer(serializers.Serializer):
     pages_daily_activity = DailyPagesSerializer(many=True, required=False)
 
 
+class IngestStatsSerializer(serializers.Serializer):
+    enqueued = serializers.IntegerField()
+    written = serializers.IntegerField()
+    dropped = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    queued = serializers.IntegerField()
+
+
 class AdminAnalyticsSerializer(serializers.Serializer):
     overview = OverviewSerializer()
     most_read_books = MostReadBookSerializer(many=True)
@@ -79,3 +89,5 @@ class AdminAnalyticsSerializer(serializers.Serializer):
     reads_per_day = ReadsPerDaySerializer(many=True)
     reads_per_hour = ReadsPerHourSerializer(many=True)
     top_search_terms = SearchTermSerializer(many=True)
+    ingest = IngestStatsSerializer(required=False)
+    generated_at = serializers.DateTimeField(required=False)
@@ -0,0 +1,177 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from catalog.models import Author, Book
+from .active_users import backfill_active_users, get_active_user_counts, mark_active
+from .ingest import EventIngestor
+from .models import BookView, BookViewHour
+from .rollups import ROLLUP_LATENESS, count_views, floor_hour, rollup_book_views
+from .view_buffer import (
+    VIEW_WRITE_GRACE, _event_key, flush_view_buffer, get_pending_views, record_book_view,
+)
+
+
+def make_user(email='reader@example.com'):
+    return get_user_model().objects.create_user(email=email, password='secret', name='Reader')
+
+
+def make_book(isbn='0000000000001'):
+    author, _ = Author.objects.get_or_create(name='Chinua Achebe')
+    return Book.objects.create(
+        title=f'Things Fall Apart {isbn}', author=author, description='A novel', isbn=isbn, file_type='PDF',
+    )
+
+
+class BookViewRollupTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.book = make_book()
+
+    def view(self, viewed_at):
+        return BookView.objects.create(user=self.user, book=self.book, viewed_at=viewed_at)
+
+    def test_views_flushed_late_are_rolled_up(self):
+        now = timezone.now()
+        # The watermark is the end of the last rolled-up bucket: put one just before it
+        self.view(floor_hour(now - ROLLUP_LATENESS) - timedelta(minutes=1))
+        rollup_book_views(since=now - timedelta(days=1))
+        self.assertEqual(count_views(now - timedelta(days=1)), 1)
+
+        # A buffered view from hours ago reaches BookView after its hour was rolled up
+        self.view(now - timedelta(hours=5))
+        rollup_book_views()
+        late_hour = floor_hour(now - timedelta(hours=5))
+        self.assertEqual(BookViewHour.objects.get(book=self.book, hour=late_hour).views, 1)
+        self.assertEqual(count_views(now - timedelta(days=1)), 2)
+
+    def test_rerun_is_idempotent(self):
+        now = timezone.now()
+        for hours in (2, 3, 3):
+            self.view(now - timedelta(hours=hours))
+        rollup_book_views(since=now - timedelta(days=1))
+        rollup_book_views(since=now - timedelta(days=1))
+        self.assertEqual(BookViewHour.objects.filter(book=self.book).count(), 2)
+        self.assertEqual(count_views(now - timedelta(days=1), group='book'), {self.book.pk: 3})
+
+
+class SearchLoggingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_book()
+
+    @mock.patch('analytics.middleware.submit_search')
+    def test_only_answered_searches_are_logged(self, submit_search):
+        self.client.get('/api/catalog/books/', {'search': 'things'})
+        self.client.get('/api/catalog/books/', {'search': 'apart', 'cursor': 'not-a-cursor'})
+        self.assertEqual([call.args[0] for call in submit_search.call_args_list], ['things'])
+
+
+class ViewBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.book = make_book()
+
+    def view_count(self):
+        self.book.refresh_from_db()
+        return self.book.view_count
+
+    def test_flush_applies_buffered_views(self):
+        record_book_view(self.book.pk, f'u{self.user.pk}', user=self.user)
+        record_book_view(self.book.pk, f'u{self.user.pk}', user=self.user)  # same viewer: deduplicated
+        record_book_view(self.book.pk, 'a10.0.0.1')
+        self.assertEqual(get_pending_views(self.book.pk), 2)
+
+        self.assertEqual(flush_view_buffer(), 2)
+        self.assertEqual((self.view_count(), get_pending_views(self.book.pk)), (2, 0))
+        self.assertEqual(BookView.objects.filter(book=self.book).count(), 1)
+
+    def test_missing_event_waits_then_is_written_off(self):
+        for viewer in ('a1', 'a2', 'a3'):
+            record_book_view(self.book.pk, viewer)
+        cache.delete(_event_key(2))
+
+        # Event 2 may still be being written: only event 1 is flushed
+        self.assertEqual(flush_view_buffer(), 1)
+        self.assertEqual((self.view_count(), get_pending_views(self.book.pk)), (1, 2))
+
+        # Once a later event is older than the grace period, event 2 is lost for good
+        user_id, book_id, _, counted = cache.get(_event_key(3))
+        cache.set(_event_key(3), (user_id, book_id, time.time() - VIEW_WRITE_GRACE - 1, counted))
+        self.assertEqual(flush_view_buffer(), 2)
+        self.assertEqual((self.view_count(), get_pending_views(self.book.pk)), (2, 0))
+
+
+@mock.patch('analytics.ingest.connection')
+class EventIngestorTests(SimpleTestCase):
+    def setUp(self):
+        self.written = []
+        self.failures = 0
+        writers = mock.patch.dict('analytics.ingest.EVENT_WRITERS', {'test': self.write})
+        writers.start()
+        self.addCleanup(writers.stop)
+
+    def write(self, payloads):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('connection lost')
+        self.written.extend(payloads)
+
+    def test_failed_batch_is_retried_once(self, connection):
+        ingestor = EventIngestor()
+        self.failures = 1
+        ingestor.queue.put_nowait(('test', 1))
+        with self.assertLogs('analytics.ingest', 'WARNING'):
+            ingestor.flush()
+        self.assertEqual(self.written, [1])
+        connection.close.assert_called()
+
+        self.failures = 2
+        ingestor.queue.put_nowait(('test', 2))
+        with self.assertLogs('analytics.ingest', 'ERROR'):
+            ingestor.flush()
+        self.assertEqual(self.written, [1])
+
+    def test_shutdown_writes_everything_submitted(self, connection):
+        ingestor = EventIngestor(interval=0.05)
+        for n in range(5):
+            ingestor.submit('test', n)
+        ingestor.shutdown(timeout=1)
+        self.assertFalse(ingestor._thread.is_alive())
+        self.assertEqual(sorted(self.written), list(range(5)))
+
+
+class ActiveUserTests(TestCase):
+    def setUp(self):
+        self.users = [make_user(f'reader{n}@example.com') for n in range(3)]
+        self.book = make_book()
+
+    def test_counts_per_window(self):
+        today = timezone.localdate()
+        mark_active([
+            (self.users[0].pk, today),
+            (self.users[1].pk, today - timedelta(days=3)),
+            (self.users[2].pk, today - timedelta(days=20)),
+            (self.users[0].pk, today - timedelta(days=20)),
+        ])
+        self.assertEqual(get_active_user_counts(today), {
+            'active_users_1d': 1, 'active_users_7d': 2, 'active_users_30d': 3, 'total_users': 3,
+        })
+
+    def test_backfill_keeps_existing_bits(self):
+        today = timezone.localdate()
+        mark_active([(self.users[2].pk, today)])
+        BookView.objects.create(user=self.users[0], book=self.book)
+        BookView.objects.create(user=self.users[1], book=self.book, viewed_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(backfill_active_users(), 2)
+        # Bits without raw rows behind them (pruned or detached) are kept
+        self.assertEqual(get_active_user_counts(today), {
+            'active_users_1d': 2, 'active_users_7d': 3, 'active_users_30d': 3, 'total_users': 3,
+        })
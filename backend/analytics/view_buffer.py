@@ -0,0 +1,202 @@
+"""Write-behind buffer for book views, applied in bulk by flush_view_buffer()."""
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from catalog.models import Book
+from .active_users import mark_active
+from .models import BookView
+
+logger = logging.getLogger(__name__)
+
+# Event log in the default cache: views:event:<n> holds (user_id, book_id, viewed_at, counted),
+# views:book:<n> outlives it to release a lost event's views:pending:<book_id> increment.
+# With LocMemCache the buffer is per process; a cache flush loses buffered views.
+VIEW_SEQ_KEY = 'views:seq'
+VIEW_FLUSHED_KEY = 'views:flushed'
+VIEW_FLUSH_LOCK_KEY = 'views:flush-lock'
+VIEW_LAST_FLUSH_KEY = 'views:last-flush'
+VIEW_DEDUP_WINDOW = 60 * 30
+# Also how late a view can reach BookView (analytics.rollups rewinds this far)
+VIEW_EVENT_TIMEOUT = getattr(settings, 'VIEW_BUFFER_MAX_LATENESS_MINUTES', 60 * 24) * 60
+VIEW_PENDING_TIMEOUT = VIEW_EVENT_TIMEOUT * 2
+VIEW_WRITE_GRACE = 60
+FLUSH_BATCH_SIZE = 500
+FLUSH_INTERVAL = 60
+FLUSH_LOCK_TIMEOUT = 60
+
+
+def _event_key(seq):
+    return f'views:event:{seq}'
+
+
+def _book_key(seq):
+    return f'views:book:{seq}'
+
+
+def _pending_key(book_id):
+    return f'views:pending:{book_id}'
+
+
+def _incr(key, delta=1, timeout=None):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key, delta)
+
+
+def get_viewer_key(request):
+    """Dedup identity: the user for authenticated requests, the client address otherwise."""
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    address = forwarded.split(',')[0].strip() or request.META.get('REMOTE_ADDR', '')
+    return f'a{address}'
+
+
+def get_pending_views(book_id):
+    """View increments for a book that are buffered but not yet in catalog_book.view_count."""
+    return max(cache.get(_pending_key(book_id)) or 0, 0)
+
+
+def record_book_view(book_id, viewer_key, user=None, count=True):
+    """Buffer a view (once per viewer per VIEW_DEDUP_WINDOW); returns the book's pending increment."""
+    if not cache.add(f'views:seen:{viewer_key}:{book_id}', 1, timeout=VIEW_DEDUP_WINDOW):
+        return get_pending_views(book_id)
+
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    # count=False only records the BookView: a reading session start is not a catalog view
+    if user_id is None and not count:
+        return get_pending_views(book_id)
+
+    seq = _incr(VIEW_SEQ_KEY)
+    # Pending first: a flush picking the event up must find the increment it releases
+    if count:
+        pending = _incr(_pending_key(book_id), timeout=VIEW_PENDING_TIMEOUT)
+        cache.touch(_pending_key(book_id), VIEW_PENDING_TIMEOUT)
+        cache.set(_book_key(seq), book_id, timeout=VIEW_PENDING_TIMEOUT)
+    else:
+        pending = get_pending_views(book_id)
+    cache.set(_event_key(seq), (user_id, book_id, time.time(), count), timeout=VIEW_EVENT_TIMEOUT)
+
+    if seq - (cache.get(VIEW_FLUSHED_KEY) or 0) >= FLUSH_BATCH_SIZE or _flush_is_due():
+        try:
+            flush_view_buffer()
+        except Exception:
+            # The events stay buffered; the next flush picks them up
+            logger.exception('Inline view buffer flush failed')
+        pending = get_pending_views(book_id)
+    return pending
+
+
+def _flush_is_due():
+    last_flush = cache.get(VIEW_LAST_FLUSH_KEY)
+    if last_flush is None:
+        cache.add(VIEW_LAST_FLUSH_KEY, time.time(), timeout=None)
+        return False
+    return time.time() - last_flush >= FLUSH_INTERVAL
+
+
+def _take_events(seqs):
+    """(events, lost seqs, last seq consumed) for the events of `seqs` that can be flushed now."""
+    # A missing event may still be being written (its sequence is taken first), so stop there,
+    # unless a later event is older than VIEW_WRITE_GRACE: then it was lost
+    found = cache.get_many([_event_key(seq) for seq in seqs])
+    # Oldest timestamp among the events after each position
+    oldest_after = [None] * len(seqs)
+    oldest = None
+    for i in range(len(seqs) - 1, -1, -1):
+        oldest_after[i] = oldest
+        event = found.get(_event_key(seqs[i]))
+        if event is not None and (oldest is None or event[2] < oldest):
+            oldest = event[2]
+
+    events = []
+    lost = []
+    consumed = seqs.start - 1
+    cutoff = time.time() - VIEW_WRITE_GRACE
+    for i, seq in enumerate(seqs):
+        event = found.get(_event_key(seq))
+        if event is not None:
+            events.append(event)
+        elif oldest_after[i] is not None and oldest_after[i] < cutoff:
+            lost.append(seq)
+        else:
+            break
+        consumed = seq
+    return events, lost, consumed
+
+
+def flush_view_buffer(max_events=5000):
+    """Apply up to max_events buffered views; returns how many were consumed (0 if already flushing)."""
+    if not cache.add(VIEW_FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        cache.set(VIEW_LAST_FLUSH_KEY, time.time(), timeout=None)
+        head = cache.get(VIEW_SEQ_KEY) or 0
+        flushed = cache.get(VIEW_FLUSHED_KEY) or 0
+        if head < flushed:
+            # The sequence was evicted and restarted
+            flushed = 0
+        if head == flushed:
+            return 0
+
+        end = min(head, flushed + max_events)
+        events, lost, consumed = _take_events(range(flushed + 1, end + 1))
+        if consumed == flushed:
+            return 0
+        seqs = range(flushed + 1, consumed + 1)
+
+        book_ids = {book_id for _, book_id, _, _ in events}
+        user_ids = {user_id for user_id, _, _, _ in events if user_id is not None}
+        live_books = set(Book.objects.filter(pk__in=book_ids).values_list('pk', flat=True))
+        live_users = set(
+            get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+        ) if user_ids else set()
+
+        increments = {}
+        views = []
+        for user_id, book_id, viewed_at, counted in events:
+            if counted:
+                increments[book_id] = increments.get(book_id, 0) + 1
+            if book_id in live_books and user_id in live_users:
+                views.append(BookView(
+                    user_id=user_id,
+                    book_id=book_id,
+                    viewed_at=datetime.fromtimestamp(viewed_at, tz=dt_timezone.utc),
+                ))
+
+        applied = {book_id: n for book_id, n in increments.items() if book_id in live_books}
+        with transaction.atomic():
+            if views:
+                BookView.objects.bulk_create(views, batch_size=1000)
+                mark_active((view.user_id, timezone.localtime(view.viewed_at).date()) for view in views)
+            if applied:
+                Book.objects.filter(pk__in=applied).update(view_count=F('view_count') + Case(
+                    *[When(pk=book_id, then=Value(n)) for book_id, n in applied.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ))
+
+        cache.set(VIEW_FLUSHED_KEY, consumed, timeout=None)
+        # Lost events were never applied, but their pending increments must still be released
+        released = dict(increments)
+        for book_id in cache.get_many([_book_key(seq) for seq in lost]).values():
+            released[book_id] = released.get(book_id, 0) + 1
+        cache.delete_many([_event_key(seq) for seq in seqs] + [_book_key(seq) for seq in seqs])
+        for book_id, n in released.items():
+            try:
+                cache.decr(_pending_key(book_id), n)
+            except ValueError:
+                pass
+        return consumed - flushed
+    finally:
+        cache.delete(VIEW_FLUSH_LOCK_KEY)
@@ -0,0 +1,80 @@
+"""Generation-versioned response cache for anonymous catalog reads."""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+# Bumped on every catalog write (catalog.signals), orphaning all older entries at once
+CATALOG_GENERATION_KEY = 'catalog:generation'
+CATALOG_CACHE_TIMEOUT = 60 * 10
+# Counters are bumped with UPDATE ... F() on hot paths; they must not invalidate the catalog.
+# They may lag by at most CATALOG_CACHE_TIMEOUT in anonymous responses.
+COUNTER_FIELDS = {'view_count', 'like_count', 'bookmark_count', 'updated_at'}
+
+
+def _fresh_generation():
+    # Time-based so a generation lost to eviction never restarts at a value older entries used
+    return int(time.time() * 1000)
+
+
+def get_catalog_generation():
+    generation = cache.get(CATALOG_GENERATION_KEY)
+    if generation is None:
+        cache.add(CATALOG_GENERATION_KEY, _fresh_generation(), timeout=None)
+        generation = cache.get(CATALOG_GENERATION_KEY) or _fresh_generation()
+    return generation
+
+
+def _bump():
+    try:
+        cache.incr(CATALOG_GENERATION_KEY)
+    except ValueError:
+        cache.set(CATALOG_GENERATION_KEY, _fresh_generation(), timeout=None)
+
+
+def bump_catalog_generation():
+    """Invalidate every cached catalog response once the current transaction commits."""
+    transaction.on_commit(_bump)
+
+
+def normalized_query_string(query_params, exclude=()):
+    """Order-insensitive query string so ?a=1&b=2 and ?b=2&a=1 share a cache entry."""
+    items = sorted(
+        (key, value)
+        for key in query_params
+        if key not in exclude
+        for value in query_params.getlist(key)
+    )
+    return '&'.join(f'{key}={value}' for key, value in items)
+
+
+def catalog_cache_key(namespace, request, exclude=()):
+    query = normalized_query_string(request.query_params, exclude)
+    digest = hashlib.md5(f'{request.path}?{query}'.encode('utf-8')).hexdigest()
+    return f'catalog:{namespace}:{get_catalog_generation()}:{digest}'
+
+
+class AnonymousCatalogCacheMixin:
+    """Serve anonymous GETs from the generation-versioned cache (successful responses only)."""
+    catalog_cache_timeout = CATALOG_CACHE_TIMEOUT
+
+    def get_anonymous_cache(self, request):
+        """(key, cached data) for an anonymous GET; (None, None) when the request is not cacheable."""
+        if request.method != 'GET' or request.user.is_authenticated:
+            return None, None
+        key = catalog_cache_key(f'response:{self.__class__.__name__}', request)
+        return key, cache.get(key)
+
+    def set_anonymous_cache(self, key, response):
+        if key is not None and response.status_code == 200:
+            cache.set(key, response.data, self.catalog_cache_timeout)
+
+    def cached_anonymous_response(self, request, build_response):
+        key, data = self.get_anonymous_cache(request)
+        if data is not None:
+            return Response(data)
+        response = build_response()
+        self.set_anonymous_cache(key, response)
+        return response
@@ -0,0 +1,93 @@
+"""Facet counts for the catalog list (?facets=categories,language,file_type,year)."""
+import hashlib
+
+from django.core.cache import cache
+from django.db import connection
+
+from .cache import get_catalog_generation, normalized_query_string
+from .models import Book, Category
+
+FACET_COLUMNS = {
+    'categories': 'bc.category_id',
+    'language': 'b.language',
+    'file_type': 'b.file_type',
+    'year': 'b.year',
+}
+FACET_CACHE_TIMEOUT = 60 * 5
+# Query params that change the page shown but not the facet counts
+NON_FILTER_PARAMS = {'facets', 'page', 'page_size', 'ordering', 'cursor', 'format'}
+
+
+def parse_facets(value):
+    """Requested facets from the ?facets= value, in canonical order; unknown names are ignored."""
+    requested = {name.strip() for name in (value or '').split(',')}
+    return [name for name in FACET_COLUMNS if name in requested]
+
+
+def facet_cache_key(query_params, facets):
+    """Cache key from the filter params, the facets and the catalog generation."""
+    query = normalized_query_string(query_params, exclude=NON_FILTER_PARAMS)
+    digest = hashlib.md5(f'{query}|{",".join(facets)}'.encode('utf-8')).hexdigest()
+    return f'catalog:facets:{get_catalog_generation()}:{digest}'
+
+
+def compute_facets(queryset, facets):
+    """{facet: [{'value': ..., 'count': n}, ...]} for `queryset`, in one GROUPING SETS query."""
+    if not facets:
+        return {}
+
+    ids_sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    book_table = Book._meta.db_table
+
+    select = []
+    grouping_sets = []
+    for name in facets:
+        column = FACET_COLUMNS[name]
+        select.append(f'{column}, GROUPING({column})')
+        grouping_sets.append(f'({column}, c.name)' if name == 'categories' else f'({column})')
+
+    joins = ''
+    if 'categories' in facets:
+        joins = (
+            f'LEFT JOIN {Book.categories.through._meta.db_table} bc ON bc.book_id = b.id '
+            f'LEFT JOIN {Category._meta.db_table} c ON c.id = bc.category_id'
+        )
+        select.append('c.name')
+
+    # count(DISTINCT) keeps scalar facets exact when the category join fans rows out
+    sql = (
+        f'SELECT {", ".join(select)}, count(DISTINCT b.id) '
+        f'FROM {book_table} b {joins} '
+        f'WHERE b.id IN ({ids_sql}) '
+        f'GROUP BY GROUPING SETS ({", ".join(grouping_sets)})'
+    )
+
+    result = {name: [] for name in facets}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            count = row[-1]
+            for index, name in enumerate(facets):
+                value, grouping = row[2 * index], row[2 * index + 1]
+                if grouping:
+                    continue
+                if name == 'categories':
+                    if value is not None:
+                        result[name].append({'value': value, 'name': row[-2], 'count': count})
+                else:
+                    result[name].append({'value': value, 'count': count})
+                break
+
+    for buckets in result.values():
+        buckets.sort(key=lambda bucket: (-bucket['count'], str(bucket['value'])))
+    return result
+
+
+def get_facets(request, queryset, facets):
+    """Cached facet counts for the current filters."""
+    key = facet_cache_key(request.query_params, facets)
+    data = cache.get(key)
+    if data is None:
+        data = compute_facets(queryset, facets)
+        cache.set(key, data, FACET_CACHE_TIMEOUT)
+    return data
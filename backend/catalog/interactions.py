@@ -0,0 +1,113 @@
+"""Likes and bookmarks as single-statement writes (one data-modifying CTE each)."""
+from django.db import connection
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Book, BookLike, Bookmark
+
+LIKE = 'like'
+BOOKMARK = 'bookmark'
+MAX_BULK_BOOK_IDS = 1000
+
+# kind -> (link model, counter column on Book)
+INTERACTIONS = {
+    LIKE: (BookLike, 'like_count'),
+    BOOKMARK: (Bookmark, 'bookmark_count'),
+}
+
+# These writes bypass model signals; this is sent with kind, user_id and book_ids instead
+interactions_changed = Signal()
+
+
+def _insert_columns(kind, user_id, location):
+    now = timezone.now()
+    columns = {'user_id': user_id, 'created_at': now}
+    if kind == BOOKMARK:
+        columns.update(location=location, updated_at=now)
+    return columns
+
+
+def toggle_interaction(kind, user_id, book_id, location=''):
+    """Flip a like/bookmark; (active, count), or None if the book is missing or unpublished."""
+    model, counter = INTERACTIONS[kind]
+    columns = _insert_columns(kind, user_id, location)
+    names = ', '.join(columns)
+    placeholders = ', '.join(f'%({name})s' for name in columns)
+    sql = f"""
+        WITH target AS (
+            SELECT id FROM {Book._meta.db_table} WHERE id = %(book_id)s AND is_published
+        ), deleted AS (
+            DELETE FROM {model._meta.db_table}
+            WHERE user_id = %(user_id)s AND book_id IN (SELECT id FROM target)
+            RETURNING book_id
+        ), inserted AS (
+            INSERT INTO {model._meta.db_table} ({names}, book_id)
+            SELECT {placeholders}, id FROM target
+            WHERE NOT EXISTS (SELECT 1 FROM deleted)
+            ON CONFLICT (user_id, book_id) DO NOTHING
+            RETURNING book_id
+        ), updated AS (
+            UPDATE {Book._meta.db_table}
+            SET {counter} = GREATEST(
+                {counter} + (SELECT count(*) FROM inserted) - (SELECT count(*) FROM deleted), 0
+            )
+            WHERE id IN (SELECT id FROM target)
+            RETURNING {counter}
+        )
+        SELECT NOT EXISTS (SELECT 1 FROM deleted), (SELECT {counter} FROM updated)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {**columns, 'book_id': book_id})
+        active, count = cursor.fetchone()
+    if count is None:
+        return None
+    interactions_changed.send(sender=model, kind=kind, user_id=user_id, book_ids=[book_id])
+    return active, count
+
+
+def set_interactions(kind, user_id, book_ids, active=True, location=''):
+    """Add (or remove) like/bookmarks on many books; {book_id: new_count} for changed books."""
+    model, counter = INTERACTIONS[kind]
+    book_ids = list({int(book_id) for book_id in book_ids})
+    if not book_ids:
+        return {}
+
+    if active:
+        columns = _insert_columns(kind, user_id, location)
+        names = ', '.join(columns)
+        placeholders = ', '.join(f'%({name})s' for name in columns)
+        changed = f"""
+            changed AS (
+                INSERT INTO {model._meta.db_table} ({names}, book_id)
+                SELECT {placeholders}, id FROM {Book._meta.db_table}
+                WHERE id = ANY(%(book_ids)s) AND is_published
+                ON CONFLICT (user_id, book_id) DO NOTHING
+                RETURNING book_id
+            )
+        """
+        delta = '+ 1'
+    else:
+        columns = {'user_id': user_id}
+        changed = f"""
+            changed AS (
+                DELETE FROM {model._meta.db_table}
+                WHERE user_id = %(user_id)s AND book_id = ANY(%(book_ids)s)
+                RETURNING book_id
+            )
+        """
+        delta = '- 1'
+
+    sql = f"""
+        WITH {changed}
+        UPDATE {Book._meta.db_table} AS b
+        SET {counter} = GREATEST(b.{counter} {delta}, 0)
+        FROM changed
+        WHERE b.id = changed.book_id
+        RETURNING b.id, b.{counter}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {**columns, 'book_ids': book_ids})
+        counts = dict(cursor.fetchall())
+    if counts:
+        interactions_changed.send(sender=model, kind=kind, user_id=user_id, book_ids=list(counts))
+    return counts
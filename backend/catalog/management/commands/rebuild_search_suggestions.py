@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from catalog.suggestions import rebuild_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search suggestion table (titles, authors, tags) from the catalog. "
+        "Run after bulk imports or periodically to refresh popularity weights."
+    )
+
+    def handle(self, *args, **options):
+        written = rebuild_suggestions()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} search suggestion(s)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from catalog.suggestions import rebuild_suggestions
+from catalog.tagging import rebuild_tag_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the normalized Tag/BookTag index and tag counts from every book's JSON tags."
+
+    def handle(self, *args, **options):
+        tags = rebuild_tag_index()
+        suggestions = rebuild_suggestions()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {tags} tag(s); rebuilt {suggestions} search suggestion(s)."
+        ))
@@ -0,0 +1,33 @@
+from django.db.models import Count, Q
+from django.core.management.base import BaseCommand
+
+from catalog.models import Category, refresh_category_book_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored published book count of every category and report any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report categories whose stored count is wrong.',
+        )
+
+    def handle(self, *args, **options):
+        drifted = []
+        categories = Category.objects.annotate(
+            actual=Count('books', filter=Q(books__is_published=True))
+        ).values_list('pk', 'name', 'book_count', 'actual')
+
+        for pk, name, stored, actual in categories:
+            if stored != actual:
+                drifted.append(pk)
+                self.stdout.write(self.style.WARNING(f"{name}: stored {stored}, actual {actual}"))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"{len(drifted)} category count(s) out of date."))
+            return
+
+        refresh_category_book_counts(drifted)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(drifted)} category count(s)."))
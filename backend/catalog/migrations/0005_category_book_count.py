@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_book_counts(apps, schema_editor):
+    Category = apps.get_model('catalog', 'Category')
+    Book = apps.get_model('catalog', 'Book')
+    published_count = (
+        Book.categories.through.objects
+        .filter(category_id=OuterRef('pk'), book__is_published=True)
+        .order_by()
+        .values('category_id')
+        .annotate(total=Count('book_id'))
+        .values('total')
+    )
+    Category.objects.update(book_count=Coalesce(Subquery(published_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_book_cloudinary_public_id_book_file_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='book_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Denormalized number of published books in this category (maintained by signals).'),
+        ),
+        migrations.RunPython(populate_book_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:28
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField
+from django.db.models.functions import Cast
+
+
+def populate_search_vectors(apps, schema_editor):
+    Book = apps.get_model('catalog', 'Book')
+    Author = apps.get_model('catalog', 'Author')
+    author_name = Subquery(Author.objects.filter(pk=OuterRef('author_id')).values('name')[:1])
+    Book.objects.update(search_vector=(
+        SearchVector('title', weight='A', config='english')
+        + SearchVector(author_name, weight='B', config='english')
+        + SearchVector(Cast('tags', TextField()), weight='C', config='english')
+        + SearchVector('description', weight='D', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_category_book_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalog_book_search_gin'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:29
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.deletion
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_term(text):
+    # Frozen copy of catalog.search.normalize_term as of this migration
+    text = unicodedata.normalize('NFKC', text or '')
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+def populate_suggestions(apps, schema_editor):
+    Book = apps.get_model('catalog', 'Book')
+    Author = apps.get_model('catalog', 'Author')
+    SearchSuggestion = apps.get_model('catalog', 'SearchSuggestion')
+    rows = []
+    tag_counts = {}
+    author_counts = {}
+
+    for book in Book.objects.filter(is_published=True).only('pk', 'title', 'view_count', 'author_id', 'tags').iterator():
+        rows.append(SearchSuggestion(
+            kind='title', book_id=book.pk, text=book.title,
+            normalized=normalize_term(book.title), weight=book.view_count,
+        ))
+        author_counts[book.author_id] = author_counts.get(book.author_id, 0) + 1
+        tags = book.tags.split(',') if isinstance(book.tags, str) else book.tags
+        if isinstance(tags, list):
+            for tag in {normalize_term(str(t)) for t in tags} - {''}:
+                tag_counts[tag] = tag_counts.get(tag, 0) + 1
+
+    for author in Author.objects.filter(pk__in=author_counts):
+        rows.append(SearchSuggestion(
+            kind='author', author_id=author.pk, text=author.name,
+            normalized=normalize_term(author.name), weight=author_counts[author.pk],
+        ))
+    for tag, count in tag_counts.items():
+        rows.append(SearchSuggestion(kind='tag', text=tag, normalized=tag, weight=count))
+
+    SearchSuggestion.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_book_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='SearchSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('title', 'Title'), ('author', 'Author'), ('tag', 'Tag')], max_length=10)),
+                ('text', models.CharField(help_text='Display text of the suggestion', max_length=255)),
+                ('normalized', models.CharField(help_text='Case-folded, whitespace-collapsed text used for matching', max_length=255)),
+                ('weight', models.PositiveIntegerField(default=0, help_text='Popularity used to break ties (views or book count)')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_suggestions', to='catalog.author')),
+                ('book', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_suggestions', to='catalog.book')),
+            ],
+            options={
+                'verbose_name': 'Search Suggestion',
+                'verbose_name_plural': 'Search Suggestions',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['normalized'], name='catalog_suggestion_trgm', opclasses=['gin_trgm_ops'])],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchsuggestion',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'title')), fields=('book',), name='catalog_suggestion_unique_title'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchsuggestion',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'author')), fields=('author',), name='catalog_suggestion_unique_author'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchsuggestion',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'tag')), fields=('normalized',), name='catalog_suggestion_unique_tag'),
+        ),
+        migrations.RunPython(populate_suggestions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:31
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_term(text):
+    # Frozen copy of catalog.search.normalize_term as of this migration
+    text = unicodedata.normalize('NFKC', text or '')
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+def populate_tag_index(apps, schema_editor):
+    Book = apps.get_model('catalog', 'Book')
+    Tag = apps.get_model('catalog', 'Tag')
+    BookTag = apps.get_model('catalog', 'BookTag')
+
+    links = {}
+    counts = {}
+    for book in Book.objects.only('pk', 'tags', 'is_published').iterator():
+        tags = book.tags.split(',') if isinstance(book.tags, str) else book.tags
+        if not isinstance(tags, list):
+            continue
+        names = {normalize_term(str(t))[:100] for t in tags} - {''}
+        links[book.pk] = names
+        for name in names:
+            counts[name] = counts.get(name, 0) + (1 if book.is_published else 0)
+
+    Tag.objects.bulk_create([Tag(name=name, book_count=count) for name, count in counts.items()], batch_size=1000)
+    tag_ids = dict(Tag.objects.values_list('name', 'pk'))
+    BookTag.objects.bulk_create(
+        [BookTag(book_id=book_id, tag_id=tag_ids[name]) for book_id, names in links.items() for name in names],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_search_suggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Normalized (case-folded) tag text', max_length=100, unique=True)),
+                ('book_count', models.PositiveIntegerField(default=0, editable=False, help_text='Denormalized number of published books carrying this tag.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-book_count', 'name'], name='catalog_tag_cloud_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BookTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='book_tags', to='catalog.book')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='book_tags', to='catalog.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'book'], name='catalog_booktag_tag_book_idx')],
+                'unique_together': {('book', 'tag')},
+            },
+        ),
+        migrations.RunPython(populate_tag_index, migrations.RunPython.noop),
+    ]
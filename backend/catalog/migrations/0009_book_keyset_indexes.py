@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_tag_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_at', 'id'], name='catalog_book_created_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['view_count', 'id'], name='catalog_book_views_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['like_count', 'id'], name='catalog_book_likes_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['title', 'id'], name='catalog_book_title_keyset'),
+        ),
+    ]
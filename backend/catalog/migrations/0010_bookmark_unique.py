@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:37
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def deduplicate_bookmarks(apps, schema_editor):
+    Book = apps.get_model('catalog', 'Book')
+    Bookmark = apps.get_model('catalog', 'Bookmark')
+
+    duplicates = (
+        Bookmark.objects.values('user_id', 'book_id')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for pair in duplicates:
+        rows = Bookmark.objects.filter(user_id=pair['user_id'], book_id=pair['book_id'])
+        keep = rows.order_by('-updated_at', '-id').values_list('id', flat=True).first()
+        rows.exclude(id=keep).delete()
+
+    counts = (
+        Bookmark.objects.filter(book_id=OuterRef('pk'))
+        .order_by().values('book_id').annotate(n=Count('id')).values('n')
+    )
+    Book.objects.update(bookmark_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('catalog', '0009_book_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_bookmarks, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='bookmark',
+            unique_together={('user', 'book')},
+        ),
+    ]
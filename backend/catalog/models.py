@@ -1,4 +1,8 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 
@@ -31,6 +35,10 @@ class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, editable=False)
     description = models.TextField(blank=True, null=True)
+    book_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Denormalized number of published books in this category (maintained by signals)."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -81,6 +89,23 @@ class Book(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Weighted full-text vector (title > author > tags > description), maintained by catalog.signals
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='catalog_book_search_gin'),
+            # Keyset pagination over the published catalog (see catalog.pagination)
+            models.Index(fields=['created_at', 'id'], name='catalog_book_created_keyset',
+                         condition=models.Q(is_published=True)),
+            models.Index(fields=['view_count', 'id'], name='catalog_book_views_keyset',
+                         condition=models.Q(is_published=True)),
+            models.Index(fields=['like_count', 'id'], name='catalog_book_likes_keyset',
+                         condition=models.Q(is_published=True)),
+            models.Index(fields=['title', 'id'], name='catalog_book_title_keyset',
+                         condition=models.Q(is_published=True)),
+        ]
+
     def save(self, *args, **kwargs):
         """Override save to populate Cloudinary metadata with canonical values"""
         if self.file:
@@ -136,9 +161,114 @@ class Bookmark(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
+        unique_together = ('user', 'book')
         verbose_name = "Bookmark"
         verbose_name_plural = "Bookmarks"
 
     def __str__(self):
         return f"Bookmark in {self.book.title} by {self.user.email} at {self.location}"
 
+
+class Tag(models.Model):
+    """Normalized tag, indexed from Book.tags (see catalog.tagging)"""
+    name = models.CharField(max_length=100, unique=True, help_text="Normalized (case-folded) tag text")
+    book_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Denormalized number of published books carrying this tag."
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['-book_count', 'name'], name='catalog_tag_cloud_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class BookTag(models.Model):
+    """Link between a book and one of its normalized tags"""
+    book = models.ForeignKey(Book, related_name='book_tags', on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, related_name='book_tags', on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('book', 'tag')
+        indexes = [
+            models.Index(fields=['tag', 'book'], name='catalog_booktag_tag_book_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} -> {self.tag_id}"
+
+
+class SearchSuggestion(models.Model):
+    """
+    Denormalized search-suggestion entry (book title, author name or tag).
+    Rows are maintained by catalog.signals and looked up through a pg_trgm index.
+    """
+    class Kind(models.TextChoices):
+        TITLE = 'title', 'Title'
+        AUTHOR = 'author', 'Author'
+        TAG = 'tag', 'Tag'
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    text = models.CharField(max_length=255, help_text="Display text of the suggestion")
+    normalized = models.CharField(max_length=255, help_text="Case-folded, whitespace-collapsed text used for matching")
+    book = models.ForeignKey(Book, related_name='search_suggestions', on_delete=models.CASCADE, null=True, blank=True)
+    author = models.ForeignKey(Author, related_name='search_suggestions', on_delete=models.CASCADE, null=True, blank=True)
+    weight = models.PositiveIntegerField(default=0, help_text="Popularity used to break ties (views or book count)")
+
+    class Meta:
+        verbose_name = "Search Suggestion"
+        verbose_name_plural = "Search Suggestions"
+        constraints = [
+            models.UniqueConstraint(fields=['book'], condition=Q(kind='title'), name='catalog_suggestion_unique_title'),
+            models.UniqueConstraint(fields=['author'], condition=Q(kind='author'), name='catalog_suggestion_unique_author'),
+            models.UniqueConstraint(fields=['normalized'], condition=Q(kind='tag'), name='catalog_suggestion_unique_tag'),
+        ]
+        indexes = [
+            GinIndex(fields=['normalized'], name='catalog_suggestion_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.text}"
+
+
+def refresh_category_book_counts(category_ids=None):
+    """Recompute Category.book_count (all, or only `category_ids`) in a single UPDATE."""
+    published_count = (
+        Book.categories.through.objects
+        .filter(category_id=OuterRef('pk'), book__is_published=True)
+        .order_by()
+        .values('category_id')
+        .annotate(total=Count('book_id'))
+        .values('total')
+    )
+    categories = Category.objects.all()
+    if category_ids is not None:
+        category_ids = list(category_ids)
+        if not category_ids:
+            return 0
+        categories = categories.filter(pk__in=category_ids)
+    return categories.update(book_count=Coalesce(Subquery(published_count), 0))
+
+
+def refresh_tag_book_counts(tag_ids=None):
+    """Recompute Tag.book_count from BookTag in a single UPDATE (optionally limited to `tag_ids`)."""
+    published_count = (
+        BookTag.objects
+        .filter(tag_id=OuterRef('pk'), book__is_published=True)
+        .order_by()
+        .values('tag_id')
+        .annotate(total=Count('book_id'))
+        .values('total')
+    )
+    tags = Tag.objects.all()
+    if tag_ids is not None:
+        tag_ids = list(tag_ids)
+        if not tag_ids:
+            return 0
+        tags = tags.filter(pk__in=tag_ids)
+    return tags.update(book_count=Coalesce(Subquery(published_count), 0))
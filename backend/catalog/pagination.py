@@ -0,0 +1,135 @@
+"""Keyset (cursor) pagination for book listings, opted into with ?pagination=cursor."""
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .search import SEARCH_RANK_FIELD
+
+
+class BookCursorPagination(BasePagination):
+    # Each cursor holds the boundary row's sort value and id: no COUNT(*) and no OFFSET
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+    # Sort keys a cursor can be built on; `id` is always appended as the tie-breaker
+    keyset_fields = ('created_at', 'view_count', 'like_count', 'title', SEARCH_RANK_FIELD)
+    default_ordering = '-created_at'
+
+    @staticmethod
+    def is_requested(request):
+        params = request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    def get_page_size(self, request):
+        default = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 20
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return default
+        return max(1, min(size, self.max_page_size))
+
+    def get_sort_key(self, queryset):
+        """First ordering term already applied by the filter backends, if it is keyset-able."""
+        ordering = queryset.query.order_by or ()
+        for term in ordering[:1]:
+            if isinstance(term, str) and term.lstrip('-') in self.keyset_fields:
+                return term
+        return self.default_ordering
+
+    def encode_cursor(self, value, pk, reverse):
+        payload = json.dumps({'v': value, 'pk': pk, 'r': reverse}, default=str)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            value = payload['v']
+            if value is None:
+                raise ValueError(encoded)
+            # A tampered cursor must fail here as a 404, not later in the query as a 500
+            value = field.to_python(value) if field is not None else float(value)
+            return value, int(payload['pk']), bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        sort_key = self.get_sort_key(queryset)
+        self.field_name = sort_key.lstrip('-')
+        descending = sort_key.startswith('-')
+        model_field = None
+        if self.field_name != SEARCH_RANK_FIELD:
+            model_field = queryset.model._meta.get_field(self.field_name)
+
+        cursor = self.decode_cursor(request, model_field)
+        reverse = bool(cursor and cursor[2])
+        # Walking backwards flips the scan direction; the page is re-reversed below
+        scan_descending = descending != reverse
+
+        if cursor is not None:
+            value, pk = cursor[0], cursor[1]
+            lt, lte = ('lt', 'lte') if scan_descending else ('gt', 'gte')
+            # The redundant `field <= value` bound lets Postgres use a range scan on (field, id)
+            queryset = queryset.filter(
+                Q(**{f'{self.field_name}__{lte}': value}),
+                Q(**{f'{self.field_name}__{lt}': value}) | Q(**{self.field_name: value, f'pk__{lt}': pk}),
+            )
+
+        prefix = '-' if scan_descending else ''
+        rows = list(queryset.order_by(f'{prefix}{self.field_name}', f'{prefix}pk')[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = cursor is not None if not reverse else has_more
+        return rows
+
+    def _cursor_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, 'pagination', 'cursor')
+        value = getattr(row, self.field_name)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(value, row.pk, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._cursor_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._cursor_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,98 @@
+"""Full-text search over Book.search_vector (kept current by catalog.signals)."""
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Cast
+from rest_framework import filters
+
+SEARCH_CONFIG = 'english'
+SEARCH_RANK_FIELD = 'search_rank'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_term(text):
+    """Unicode-normalize, case-fold and collapse whitespace ("  Things  FALL " -> "things fall")."""
+    text = unicodedata.normalize('NFKC', text or '')
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+def book_search_vector():
+    """Weighted search vector expression for an UPDATE (title > author > tags > description)."""
+    from .models import Author
+
+    # UPDATE cannot join, so the author name comes from a scalar subquery
+    author_name = Subquery(Author.objects.filter(pk=OuterRef('author_id')).values('name')[:1])
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(author_name, weight='B', config=SEARCH_CONFIG)
+        + SearchVector(Cast('tags', TextField()), weight='C', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored search vector for every book in `queryset`."""
+    return queryset.update(search_vector=book_search_vector())
+
+
+def get_search_text(request):
+    """Frontend sends `query` while DRF convention is `search`; accept both."""
+    return (request.query_params.get('query') or request.query_params.get('search') or '').strip()
+
+
+def _raw_search_query(text):
+    terms = _TERM_RE.findall(text.lower())
+    if not terms:
+        return None
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def build_search_query(text):
+    """Prefix-matching tsquery for free text ("thin fall" -> thin:* & fall:*), or None."""
+    raw = _raw_search_query(text)
+    if raw is None:
+        return None
+    return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+
+def _has_lexemes(text):
+    """False if `text` leaves an empty tsquery (only punctuation or stop words)."""
+    raw = _raw_search_query(text)
+    if raw is None:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT numnode(to_tsquery(%s::regconfig, %s))", [SEARCH_CONFIG, raw])
+        return cursor.fetchone()[0] > 0
+
+
+def apply_search(queryset, text):
+    """Filter `queryset` by full-text match on `text` and annotate the relevance rank."""
+    if not _has_lexemes(text):
+        # Nothing the index can match on ("the", "?!"): substring match, like the search it replaced
+        return queryset.filter(
+            Q(title__icontains=text)
+            | Q(author__name__icontains=text)
+            | Q(description__icontains=text)
+            | Q(tags__icontains=text)
+        ).annotate(**{SEARCH_RANK_FIELD: Value(0.0, output_field=FloatField())})
+    query = build_search_query(text)
+    # ts_rank returns float4; casting to float8 keeps the value exact when it round-trips
+    # through a pagination cursor
+    return queryset.filter(search_vector=query).annotate(
+        **{SEARCH_RANK_FIELD: Cast(SearchRank(F('search_vector'), query), FloatField())}
+    )
+
+
+class SearchRankOrderingFilter(filters.OrderingFilter):
+    """Order search results by relevance unless the client asks for an explicit ?ordering=."""
+
+    def get_default_ordering(self, view):
+        request = getattr(view, 'request', None)
+        if request is not None and get_search_text(request):
+            return [f'-{SEARCH_RANK_FIELD}', '-created_at']
+        return super().get_default_ordering(view)
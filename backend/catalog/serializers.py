@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Category, Book, BookLike, Bookmark, Author
+from .models import Category, Book, BookLike, Bookmark, Author, Tag
 from django.contrib.auth import get_user_model
 
 # Custom User model
@@ -10,15 +10,66 @@ User = get_user_model()
 # CATEGORY SERIALIZER
 # ---------------------------
 class CategorySerializer(serializers.ModelSerializer):
-    book_count = serializers.SerializerMethodField()
+    # Stored count maintained by catalog.signals, so nesting this serializer costs no queries
+    book_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'book_count', 'created_at']
         read_only_fields = ['id', 'created_at']
 
-    def get_book_count(self, obj):
-        return obj.books.filter(is_published=True).count()
+
+# ---------------------------
+# TAG SERIALIZER
+# ---------------------------
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['id', 'name', 'book_count']
+        read_only_fields = fields
+
+
+# ---------------------------
+# VIEWER STATE
+# ---------------------------
+MAX_VIEWER_STATE_BOOKS = 500
+
+
+def build_viewer_state(user, book_ids):
+    """{book_id: {'liked', 'bookmarked', 'progress'}} for many books in three set-based queries."""
+    book_ids = list(book_ids)
+    if not book_ids or not user or not user.is_authenticated:
+        return {}
+
+    liked_ids = set(
+        BookLike.objects.filter(user=user, book_id__in=book_ids).values_list('book_id', flat=True)
+    )
+    bookmarked_ids = set(
+        Bookmark.objects.filter(user=user, book_id__in=book_ids).values_list('book_id', flat=True)
+    )
+
+    progress_map = {}
+    try:
+        from reading.models import ReadingProgress
+        for row in ReadingProgress.objects.filter(user=user, book_id__in=book_ids).values(
+            'book_id', 'percent', 'last_location', 'completed'
+        ):
+            progress_map[row['book_id']] = {
+                'percent': row['percent'],
+                'last_location': row['last_location'],
+                'completed': row['completed'],
+            }
+    except ImportError:
+        pass
+
+    return {
+        book_id: {
+            'liked': book_id in liked_ids,
+            'bookmarked': book_id in bookmarked_ids,
+            'progress': progress_map.get(book_id),
+        }
+        for book_id in book_ids
+    }
 
 
 # ---------------------------
@@ -43,19 +94,35 @@ class BookListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    def _get_viewer_state(self, obj):
+        """Pre-resolved viewer state handed in by the view, if any."""
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is None:
+            return None
+        return viewer_state.get(obj.pk, {})
+
     def get_is_liked(self, obj):
+        state = self._get_viewer_state(obj)
+        if state is not None:
+            return state.get('liked', False)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.likes.filter(user=request.user).exists()
         return False
 
     def get_is_bookmarked(self, obj):
+        state = self._get_viewer_state(obj)
+        if state is not None:
+            return state.get('bookmarked', False)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.bookmarks.filter(user=request.user).exists()
         return False
 
     def get_reading_progress(self, obj):
+        state = self._get_viewer_state(obj)
+        if state is not None:
+            return state.get('progress')
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             try:
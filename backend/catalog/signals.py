@@ -0,0 +1,155 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import COUNTER_FIELDS, bump_catalog_generation
+from .models import Author, Book, Category, refresh_category_book_counts, refresh_tag_book_counts
+from .search import update_search_vectors
+from .suggestions import refresh_author_suggestions, refresh_tag_suggestions, refresh_title_suggestion
+from .tagging import normalize_tags, sync_book_tags
+
+
+# --- Category.book_count maintenance ---
+# Counts are recomputed for the affected categories only (one UPDATE each time),
+# so they stay correct even if a publish flag and the category set change together.
+
+# --- Book.search_vector maintenance ---
+SEARCH_SOURCE_FIELDS = {'title', 'author', 'author_id', 'tags', 'description'}
+
+
+@receiver(post_save, sender=Book)
+def book_search_vector_saved(sender, instance, update_fields=None, **kwargs):
+    """Recompute the stored search vector when any of its source fields may have changed."""
+    if update_fields is not None and not SEARCH_SOURCE_FIELDS.intersection(update_fields):
+        return
+    update_search_vectors(Book.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Author)
+def author_saved(sender, instance, created, **kwargs):
+    """An author rename changes the vectors of all their books."""
+    if not created:
+        update_search_vectors(Book.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Refresh counts when a book is created or its publish flag may have changed."""
+    if update_fields is not None and 'is_published' not in update_fields:
+        return
+    if created:
+        # A brand-new book has no categories yet; m2m_changed handles the assignment.
+        return
+    refresh_category_book_counts(instance.categories.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Book)
+def book_pre_delete(sender, instance, **kwargs):
+    """Remember the categories before the M2M rows are cascaded away."""
+    instance._category_ids = list(instance.categories.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance, **kwargs):
+    refresh_category_book_counts(getattr(instance, '_category_ids', []))
+
+
+@receiver(m2m_changed, sender=Book.categories.through)
+def book_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh counts on category (re)assignment from either side of the relation."""
+    if action == 'pre_clear':
+        if reverse:
+            instance._cleared_category_ids = [instance.pk]
+        else:
+            instance._cleared_category_ids = list(instance.categories.values_list('pk', flat=True))
+        return
+
+    if action == 'post_clear':
+        refresh_category_book_counts(getattr(instance, '_cleared_category_ids', []))
+        return
+
+    if action in ('post_add', 'post_remove'):
+        if reverse:
+            # instance is a Category, pk_set holds book ids
+            refresh_category_book_counts([instance.pk])
+        else:
+            refresh_category_book_counts(pk_set or [])
+
+
+# --- Tag index maintenance ---
+# Registered before the suggestion receivers below, which read the refreshed Tag.book_count.
+TAG_SOURCE_FIELDS = {'tags', 'is_published'}
+
+
+@receiver(post_save, sender=Book)
+def book_tags_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not TAG_SOURCE_FIELDS.intersection(update_fields):
+        return
+    sync_book_tags(instance)
+
+
+@receiver(pre_delete, sender=Book)
+def book_tags_pre_delete(sender, instance, **kwargs):
+    instance._tag_ids = list(instance.book_tags.values_list('tag_id', flat=True))
+
+
+@receiver(post_delete, sender=Book)
+def book_tags_deleted(sender, instance, **kwargs):
+    refresh_tag_book_counts(getattr(instance, '_tag_ids', []))
+
+
+# --- SearchSuggestion maintenance ---
+SUGGESTION_SOURCE_FIELDS = {'title', 'author', 'author_id', 'tags', 'is_published', 'view_count'}
+
+
+@receiver(pre_save, sender=Book)
+def book_pre_save_suggestions(sender, instance, **kwargs):
+    """Remember the previous author and tags so their suggestion rows can be re-weighted."""
+    previous = Book.objects.filter(pk=instance.pk).values('author_id', 'tags').first() if instance.pk else None
+    instance._previous_author_id = previous['author_id'] if previous else None
+    instance._previous_tags = normalize_tags(previous['tags']) if previous else set()
+
+
+@receiver(post_save, sender=Book)
+def book_suggestions_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SUGGESTION_SOURCE_FIELDS.intersection(update_fields):
+        return
+    refresh_title_suggestion(instance)
+    refresh_author_suggestions([instance.author_id, getattr(instance, '_previous_author_id', None)])
+    refresh_tag_suggestions(normalize_tags(instance.tags) | getattr(instance, '_previous_tags', set()))
+
+
+@receiver(post_delete, sender=Book)
+def book_suggestions_deleted(sender, instance, **kwargs):
+    # The title row is removed by the CASCADE; authors and tags need re-weighting.
+    refresh_author_suggestions([instance.author_id])
+    refresh_tag_suggestions(normalize_tags(instance.tags))
+
+
+@receiver(post_save, sender=Author)
+def author_suggestions_saved(sender, instance, created, **kwargs):
+    if not created:
+        refresh_author_suggestions([instance.pk])
+
+
+# --- Anonymous response cache invalidation ---
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Author)
+def catalog_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= COUNTER_FIELDS:
+        return
+    bump_catalog_generation()
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Author)
+def catalog_deleted(sender, instance, **kwargs):
+    bump_catalog_generation()
+
+
+@receiver(m2m_changed, sender=Book.categories.through)
+def catalog_categories_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalog_generation()
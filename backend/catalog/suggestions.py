@@ -0,0 +1,116 @@
+"""Maintenance and lookup for the trigram-indexed SearchSuggestion table."""
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Case, Count, FloatField, Q, Value, When
+
+from .models import Author, Book, SearchSuggestion, Tag
+from .search import normalize_term
+
+MIN_QUERY_LENGTH = 2
+PREFIX_BOOST = 1.0
+# pg_trgm's default (0.6) rejects most single-letter typos in short words ("achbe" -> "achebe")
+WORD_SIMILARITY_THRESHOLD = 0.4
+
+
+def refresh_title_suggestion(book):
+    if not book.is_published:
+        SearchSuggestion.objects.filter(kind=SearchSuggestion.Kind.TITLE, book=book).delete()
+        return
+    SearchSuggestion.objects.update_or_create(
+        kind=SearchSuggestion.Kind.TITLE,
+        book=book,
+        defaults={
+            'text': book.title,
+            'normalized': normalize_term(book.title),
+            'weight': book.view_count,
+        },
+    )
+
+
+def refresh_author_suggestions(author_ids):
+    """Upsert author rows weighted by published book count; drop authors with no published books."""
+    for author in Author.objects.filter(pk__in=set(filter(None, author_ids))).annotate(
+        published=Count('books', filter=Q(books__is_published=True))
+    ):
+        if not author.published:
+            SearchSuggestion.objects.filter(kind=SearchSuggestion.Kind.AUTHOR, author=author).delete()
+            continue
+        SearchSuggestion.objects.update_or_create(
+            kind=SearchSuggestion.Kind.AUTHOR,
+            author=author,
+            defaults={
+                'text': author.name,
+                'normalized': normalize_term(author.name),
+                'weight': author.published,
+            },
+        )
+
+
+def refresh_tag_suggestions(tags):
+    """Upsert tag rows weighted by Tag.book_count (sync the tag index first); drop unused tags."""
+    tags = set(tags)
+    counts = dict(Tag.objects.filter(name__in=tags).values_list('name', 'book_count'))
+    for tag in tags:
+        count = counts.get(tag, 0)
+        if not count:
+            SearchSuggestion.objects.filter(kind=SearchSuggestion.Kind.TAG, normalized=tag).delete()
+            continue
+        SearchSuggestion.objects.update_or_create(
+            kind=SearchSuggestion.Kind.TAG,
+            normalized=tag,
+            defaults={'text': tag, 'weight': count},
+        )
+
+
+@transaction.atomic
+def rebuild_suggestions():
+    """Rebuild the whole table from the catalog. Returns the number of rows written."""
+    SearchSuggestion.objects.all().delete()
+    rows = []
+
+    for book_id, title, views in Book.objects.filter(is_published=True).values_list('pk', 'title', 'view_count'):
+        rows.append(SearchSuggestion(
+            kind=SearchSuggestion.Kind.TITLE, book_id=book_id, text=title,
+            normalized=normalize_term(title), weight=views,
+        ))
+
+    authors = Author.objects.annotate(
+        published=Count('books', filter=Q(books__is_published=True))
+    ).filter(published__gt=0).values_list('pk', 'name', 'published')
+    for author_id, name, published in authors:
+        rows.append(SearchSuggestion(
+            kind=SearchSuggestion.Kind.AUTHOR, author_id=author_id, text=name,
+            normalized=normalize_term(name), weight=published,
+        ))
+
+    for name, count in Tag.objects.filter(book_count__gt=0).values_list('name', 'book_count'):
+        rows.append(SearchSuggestion(kind=SearchSuggestion.Kind.TAG, text=name, normalized=name, weight=count))
+
+    SearchSuggestion.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def find_suggestions(query, limit=10):
+    """Ranked, typo-tolerant suggestions for `query` (word similarity + prefix boost)."""
+    normalized = normalize_term(query)
+    if len(normalized) < MIN_QUERY_LENGTH:
+        return []
+
+    prefix_boost = Case(
+        When(normalized__startswith=normalized, then=Value(PREFIX_BOOST)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # SET LOCAL scopes the threshold used by the indexed %> operator to this transaction
+            cursor.execute(
+                f"SET LOCAL pg_trgm.word_similarity_threshold = {float(WORD_SIMILARITY_THRESHOLD)}"
+            )
+        return list(
+            SearchSuggestion.objects
+            .filter(Q(normalized__trigram_word_similar=normalized) | Q(normalized__startswith=normalized))
+            .annotate(score=TrigramWordSimilarity(normalized, 'normalized') + prefix_boost)
+            .order_by('-score', '-weight')
+            .values('kind', 'text', 'book_id')[:limit]
+        )
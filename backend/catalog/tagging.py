@@ -0,0 +1,61 @@
+"""Normalized tag index: Book.tags mirrored into Tag/BookTag on every save."""
+from django.db import transaction
+
+from .models import Book, BookTag, Tag, refresh_tag_book_counts
+from .search import normalize_term
+
+MAX_TAG_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def normalize_tags(tags):
+    """Normalized, de-duplicated tags from a Book.tags value (list, or legacy comma string)."""
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    if not isinstance(tags, (list, tuple)):
+        return set()
+    normalized = (normalize_term(str(tag))[:MAX_TAG_LENGTH] for tag in tags)
+    return {tag for tag in normalized if tag}
+
+
+def get_or_create_tags(names):
+    """Map normalized tag names to Tag rows, creating the missing ones in bulk."""
+    names = set(names)
+    if not names:
+        return {}
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    return dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+
+
+@transaction.atomic
+def sync_book_tags(book):
+    """Mirror `book.tags` into BookTag and refresh the counts of every tag that changed."""
+    wanted = get_or_create_tags(normalize_tags(book.tags))
+    current = set(BookTag.objects.filter(book=book).values_list('tag_id', flat=True))
+    wanted_ids = set(wanted.values())
+
+    removed = current - wanted_ids
+    added = wanted_ids - current
+    if removed:
+        BookTag.objects.filter(book=book, tag_id__in=removed).delete()
+    if added:
+        BookTag.objects.bulk_create([BookTag(book=book, tag_id=tag_id) for tag_id in added], ignore_conflicts=True)
+
+    # Publishing or unpublishing changes the count of every tag on the book
+    refresh_tag_book_counts(current | wanted_ids)
+
+
+@transaction.atomic
+def rebuild_tag_index():
+    """Rebuild BookTag from every book's JSON tags and recompute all counts."""
+    BookTag.objects.all().delete()
+    links = {}
+    for book_id, tags in Book.objects.values_list('pk', 'tags').iterator():
+        links[book_id] = normalize_tags(tags)
+
+    tag_ids = get_or_create_tags(set().union(*links.values()) if links else set())
+    BookTag.objects.bulk_create(
+        [BookTag(book_id=book_id, tag_id=tag_ids[name]) for book_id, names in links.items() for name in names],
+        batch_size=1000,
+    )
+    refresh_tag_book_counts()
+    return len(tag_ids)
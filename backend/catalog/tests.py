@@ -0,0 +1,126 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import Author, Book
+
+
+def make_user(email='reader@example.com'):
+    return get_user_model().objects.create_user(email=email, password='secret', name='Reader')
+
+
+def make_books(count, **fields):
+    author, _ = Author.objects.get_or_create(name='Chinua Achebe')
+    return [
+        Book.objects.create(
+            title=f'Things Fall Apart {i}', author=author, description='A novel', isbn=f'{i:013d}',
+            file_type='PDF', **fields,
+        )
+        for i in range(count)
+    ]
+
+
+def encode(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+class BookCursorPaginationTests(TestCase):
+    url = '/api/catalog/books/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user())
+        # Equal view counts make every page boundary a tie broken by id
+        self.books = make_books(7, view_count=3)
+
+    def walk(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        ids = [row['id'] for row in response.data['results']]
+        pages = [response.data]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [row['id'] for row in response.data['results']]
+            pages.append(response.data)
+        return ids, pages
+
+    def test_pages_cover_every_book_once(self):
+        ids, pages = self.walk({'pagination': 'cursor', 'page_size': 3, 'ordering': '-view_count'})
+        self.assertEqual(sorted(ids), sorted(book.pk for book in self.books))
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_returns_the_page_before(self):
+        ids, pages = self.walk({'pagination': 'cursor', 'page_size': 3})
+        response = self.client.get(pages[1]['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], ids[:3])
+
+    def test_tampered_cursor_is_not_found(self):
+        for cursor in (
+            'not-base64!', encode(['v']), encode({'v': 'yesterday', 'pk': 1}),
+            encode({'v': '2026-10-01T00:00:00Z', 'pk': 'x'}), encode({'v': None, 'pk': 1}),
+        ):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class BookSearchTests(TestCase):
+    url = '/api/catalog/books/'
+
+    def setUp(self):
+        cache.clear()
+        author = Author.objects.create(name='Ngugi wa Thiongo')
+        self.book = Book.objects.create(
+            title='The River Between', author=author, description='Two villages on a ridge',
+            isbn='0000000000099', file_type='PDF',
+        )
+        make_books(2)
+
+    def search(self, text):
+        response = self.client.get(self.url, {'search': text})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search('riv vill'), [self.book.pk])
+
+    def test_stop_words_and_punctuation_fall_back_to_substring_match(self):
+        self.assertEqual(self.search('the'), [self.book.pk])
+        self.assertEqual(self.search('?!'), [])
+
+
+class BulkLikeTests(TestCase):
+    url = '/api/catalog/books/likes/bulk/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user())
+        self.books = make_books(2)
+        self.ids = [book.pk for book in self.books]
+
+    def like_counts(self):
+        return [Book.objects.get(pk=pk).like_count for pk in self.ids]
+
+    def test_like_and_unlike_many(self):
+        response = self.client.post(self.url, {'book_ids': self.ids, 'liked': True}, format='json')
+        self.assertEqual((response.status_code, response.data['changed']), (200, 2))
+        # Already liked: nothing changes
+        response = self.client.post(self.url, {'book_ids': self.ids}, format='json')
+        self.assertEqual(response.data['changed'], 0)
+        self.assertEqual(self.like_counts(), [1, 1])
+
+        response = self.client.post(self.url, {'book_ids': self.ids[:1], 'liked': 'False'}, format='json')
+        self.assertEqual((response.data['liked'], response.data['changed']), (False, 1))
+        self.assertEqual(self.like_counts(), [0, 1])
+
+    def test_unrecognised_liked_is_rejected(self):
+        response = self.client.post(self.url, {'book_ids': self.ids, 'liked': 'maybe'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.like_counts(), [0, 0])
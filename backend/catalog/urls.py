@@ -7,10 +7,14 @@ router = DefaultRouter()
 router.register(r'books', views.BookViewSet, basename='book')
 
 urlpatterns = [
+    # Before the router, whose books/<pk>/ route would otherwise match books/state/
+    path('books/state/', views.book_state, name='book-state'),
+
     # Include the router URLs
     path('', include(router.urls)),
 
     path('categories/', views.CategoryListView.as_view(), name='category-list'),
+    path('tags/', views.TagCloudView.as_view(), name='tag-cloud'),
 
 # Interaction/Utility Endpoints
     path('books/<int:book_id>/cover/', views.book_cover, name='book-cover'),
@@ -18,5 +22,6 @@ urlpatterns = [
     path('books/<int:book_id>/read/token/', views.book_read_token, name='book-read-token'),
     path('books/<int:book_id>/like/', views.toggle_like, name='book-like'),
     path('books/<int:book_id>/bookmark/', views.toggle_bookmark, name='book-bookmark'),
+    path('books/likes/bulk/', views.bulk_like, name='book-like-bulk'),
     path('search/suggestions/', views.search_suggestions, name='search-suggestions'),
 ]
@@ -8,10 +8,11 @@ import time
 from urllib.parse import urlparse
 from django.utils import timezone
 from django.shortcuts import get_object_or_404   
-from rest_framework import generics, status, filters, viewsets
+from rest_framework import generics, status, filters, viewsets, serializers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from rest_framework.exceptions import APIException
 from django_filters.rest_framework import DjangoFilterBackend
 from django.http import Http404, HttpResponse
 from django.db.models import Q, Max, F 
@@ -19,14 +20,21 @@ from django.db.models import Q, Max, F
 from django.conf import settings 
 from django.http import HttpResponse, Http404, FileResponse, StreamingHttpResponse, HttpResponseRedirect
 
-from .models import Category, Book, BookLike, Bookmark
+from .models import Category, Book, BookLike, Bookmark, Tag
 from .serializers import (
     CategorySerializer, BookListSerializer, BookDetailSerializer,
-    BookCreateUpdateSerializer, BookLikeSerializer, BookmarkSerializer
+    BookCreateUpdateSerializer, BookLikeSerializer, BookmarkSerializer,
+    TagSerializer, build_viewer_state, MAX_VIEWER_STATE_BOOKS
 )
+from .search import SearchRankOrderingFilter, apply_search, get_search_text, normalize_term
+from .suggestions import find_suggestions
+from .facets import get_facets, parse_facets
+from .pagination import BookCursorPagination
+from .cache import AnonymousCatalogCacheMixin
+from .interactions import BOOKMARK, LIKE, MAX_BULK_BOOK_IDS, set_interactions, toggle_interaction
 from accounts.permissions import IsAdminRole
 from rest_framework.parsers import MultiPartParser, FormParser
-from analytics.models import BookView
+from analytics.view_buffer import get_viewer_key, record_book_view
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -43,24 +51,45 @@ retry_config = Retry(
 cloudinary_session.mount('https://', HTTPAdapter(max_retries=retry_config))
 
 # --- CATEGORY VIEWS ---
-class CategoryListView(generics.ListAPIView):
-    """List all categories with book counts"""
+class CategoryListView(AnonymousCatalogCacheMixin, generics.ListAPIView):
+    """List all categories with book counts (anonymous reads are cached)"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_anonymous_response(request, lambda: super(CategoryListView, self).list(request, *args, **kwargs))
+
+
+# --- TAG VIEWS ---
+class TagCloudView(generics.ListAPIView):
+    """Tag cloud from the precomputed Tag.book_count (?limit=, default 100)"""
+    serializer_class = TagSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
+    default_limit = 100
+    max_limit = 500
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except (TypeError, ValueError):
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        return Tag.objects.filter(book_count__gt=0).order_by('-book_count', 'name')[:limit]
+
 
 # --- BOOK LIST/CREATE VIEWS ---
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(AnonymousCatalogCacheMixin, viewsets.ModelViewSet):
     """
     Handles CRUD operations for Books, replacing BookListCreateView and BookDetailView.
     """
     # REQUIRED for file upload to be detected by Swagger/DRF
     parser_classes = (MultiPartParser, FormParser) 
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Free-text search (?query= / ?search=) is handled in get_queryset via the stored search vector
+    filter_backends = [DjangoFilterBackend, SearchRankOrderingFilter]
     filterset_fields = ['categories__id', 'language', 'year', 'file_type'] 
-    search_fields = ['title', 'author__name', 'description', '@tags'] # NOTE: changed to author__name for ForeignKey lookup
     ordering_fields = ['created_at', 'view_count', 'like_count', 'title']
     ordering = ['-created_at']
 
@@ -70,19 +99,32 @@ class BookViewSet(viewsets.ModelViewSet):
         Frontend sends `query` while DRF's SearchFilter defaults to `search`,
         so we support both for convenience.
         """
-        qs = Book.objects.filter(is_published=True) if self.action in ['list', 'retrieve'] else Book.objects.all()
+        if self.action in ['list', 'retrieve']:
+            qs = Book.objects.filter(is_published=True).select_related('author').prefetch_related('categories')
+        else:
+            qs = Book.objects.all()
+
+        # Exact tag filter (?tag=classic, repeatable for AND) through the normalized tag index
+        for tag in self.request.query_params.getlist('tag'):
+            tag = normalize_term(tag)
+            if tag:
+                qs = qs.filter(book_tags__tag__name=tag)
 
-        request = self.request
-        query = request.query_params.get('query') or request.query_params.get('search')
+        query = get_search_text(self.request)
         if query:
-            qs = qs.filter(
-                Q(title__icontains=query)
-                | Q(author__name__icontains=query)
-                | Q(description__icontains=query)
-                | Q(tags__icontains=query)
-            )
+            qs = apply_search(qs, query)
         return qs
 
+    @property
+    def paginator(self):
+        """Keyset pagination on ?pagination=cursor, else the admin UI's page-number pagination."""
+        if not hasattr(self, '_paginator'):
+            if BookCursorPagination.is_requested(self.request):
+                self._paginator = BookCursorPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
+
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return BookCreateUpdateSerializer
@@ -96,10 +138,42 @@ class BookViewSet(viewsets.ModelViewSet):
             return [IsAdminRole()] 
         return [AllowAny()]
 
+    def get_viewer_serializer_context(self, books):
+        """Serializer context with the viewer state of all `books` resolved at once."""
+        context = self.get_serializer_context()
+        context['viewer_state'] = build_viewer_state(self.request.user, [book.pk for book in books])
+        return context
+
     def list(self, request, *args, **kwargs):
-        """Override list to add error handling"""
+        """Override list to add error handling, batched viewer state and ?facets= counts"""
         try:
-            return super().list(request, *args, **kwargs)
+            cache_key, cached = self.get_anonymous_cache(request)
+            if cached is not None:
+                return Response(cached)
+
+            queryset = self.filter_queryset(self.get_queryset())
+
+            page = self.paginate_queryset(queryset)
+            books = list(page) if page is not None else list(queryset)
+            serializer = self.get_serializer(
+                books, many=True, context=self.get_viewer_serializer_context(books)
+            )
+            if page is not None:
+                response = self.get_paginated_response(serializer.data)
+            else:
+                response = Response(serializer.data)
+
+            facets = parse_facets(request.query_params.get('facets'))
+            if facets:
+                if page is None:
+                    response.data = {'results': response.data}
+                response.data['facets'] = get_facets(request, queryset, facets)
+
+            self.set_anonymous_cache(cache_key, response)
+            return response
+        except APIException:
+            # Invalid page/cursor and similar client errors keep their 4xx status
+            raise
         except Exception as e:
             logger.error(f"Error listing books: {str(e)}", exc_info=True)
             return Response(
@@ -110,22 +184,23 @@ class BookViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         """Re-implement the view count logic from the old BookDetailView"""
         try:
+            cache_key, cached = self.get_anonymous_cache(request)
+            if cached is not None:
+                # Cached body, but the view is still counted (buffered, see analytics.view_buffer)
+                record_book_view(cached['id'], get_viewer_key(request))
+                return Response(cached)
+
             instance = self.get_object()
-            
-            # Increment view count
-            Book.objects.filter(pk=instance.pk).update(view_count=F('view_count') + 1)
-            
-            # Create BookView record for analytics (only for authenticated users)
-            if request.user.is_authenticated:
-                BookView.objects.create(
-                    user=request.user,
-                    book=instance
-                )
-            
-            instance.refresh_from_db()
-
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
+
+            # Buffered view: the counter and BookView row are written in bulk by the flusher
+            instance.view_count += record_book_view(instance.pk, get_viewer_key(request), user=request.user)
+
+            serializer = self.get_serializer(
+                instance, context=self.get_viewer_serializer_context([instance])
+            )
+            response = Response(serializer.data)
+            self.set_anonymous_cache(cache_key, response)
+            return response
         except Exception as e:
             logger.error(f"Error retrieving book: {str(e)}", exc_info=True)
             return Response(
@@ -215,36 +290,52 @@ def book_read_token(request, book_id):
 
 
 # --- LIKE/BOOKMARK VIEWS ---
+def _parse_book_ids(request, limit):
+    """Validate a {"book_ids": [...]} body. Returns (ids, None) or (None, error response)."""
+    book_ids = request.data.get('book_ids')
+    if not isinstance(book_ids, list) or not book_ids:
+        return None, Response({'error': 'book_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(book_ids) > limit:
+        return None, Response(
+            {'error': f'At most {limit} book_ids per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        return list(dict.fromkeys(int(book_id) for book_id in book_ids)), None
+    except (TypeError, ValueError):
+        return None, Response({'error': 'book_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def book_state(request):
+    """Per-user state for many books ({"book_ids": [...]}), cached apart from book metadata"""
+    book_ids, error = _parse_book_ids(request, MAX_VIEWER_STATE_BOOKS)
+    if error:
+        return error
+
+    states = {}
+    for book_id, state in build_viewer_state(request.user, book_ids).items():
+        progress = state['progress'] or {}
+        states[str(book_id)] = {
+            'liked': state['liked'],
+            'bookmarked': state['bookmarked'],
+            'percent': progress.get('percent'),
+            'completed': progress.get('completed', False),
+        }
+    return Response({'states': states})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def toggle_like(request, book_id):
-    """Toggle book like"""
+    """Toggle book like (one statement: link row and like_count change together)"""
     try:
-        book = Book.objects.get(id=book_id, is_published=True)
-        user = request.user
-        
-        like = BookLike.objects.filter(user=user, book=book).first()
-        
-        if like:
-            like.delete()
-            
-            # Re-fetch book to ensure we have latest data
-            book.refresh_from_db()
-            if book.like_count > 0:
-                book.like_count -= 1
-                book.save(update_fields=['like_count'])
-            
-            book.refresh_from_db()
-            return Response({'liked': False, 'like_count': book.like_count})
-        else:
-            BookLike.objects.create(user=user, book=book)
-            Book.objects.filter(pk=book.pk).update(like_count=F('like_count') + 1)
-            
-            book.refresh_from_db()
-            return Response({'liked': True, 'like_count': book.like_count})
-    
-    except Book.DoesNotExist:
-        return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+        result = toggle_interaction(LIKE, request.user.pk, book_id)
+        if result is None:
+            return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+        liked, like_count = result
+        return Response({'liked': liked, 'like_count': like_count})
     except Exception as e:
         logger.error(f"Error toggling like for book {book_id}: {str(e)}", exc_info=True)
         return Response(
@@ -256,33 +347,14 @@ def toggle_like(request, book_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def toggle_bookmark(request, book_id):
-    """Toggle book bookmark"""
+    """Toggle book bookmark (one statement: link row and bookmark_count change together)"""
     try:
-        book = Book.objects.get(id=book_id, is_published=True)
-        user = request.user
         location = request.data.get('location', '')
-        
-        bookmark = Bookmark.objects.filter(user=user, book=book).first()
-        
-        if bookmark:
-            bookmark.delete()
-            # Re-fetch book
-            book.refresh_from_db()
-            if book.bookmark_count > 0:
-                book.bookmark_count -= 1
-                book.save(update_fields=['bookmark_count'])
-            
-            book.refresh_from_db()
-            return Response({'bookmarked': False, 'bookmark_count': book.bookmark_count})
-        else:
-            Bookmark.objects.create(user=user, book=book, location=location)
-            Book.objects.filter(pk=book.pk).update(bookmark_count=F('bookmark_count') + 1)
-            
-            book.refresh_from_db()
-            return Response({'bookmarked': True, 'bookmark_count': book.bookmark_count})
-    
-    except Book.DoesNotExist:
-        return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+        result = toggle_interaction(BOOKMARK, request.user.pk, book_id, location=location)
+        if result is None:
+            return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+        bookmarked, bookmark_count = result
+        return Response({'bookmarked': bookmarked, 'bookmark_count': bookmark_count})
     except Exception as e:
         logger.error(f"Error toggling bookmark for book {book_id}: {str(e)}", exc_info=True)
         return Response(
@@ -291,55 +363,51 @@ def toggle_bookmark(request, book_id):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_like(request):
+    """Like (or, with "liked": false, unlike) many books: {"book_ids": [...], "liked": true}"""
+    book_ids, error = _parse_book_ids(request, MAX_BULK_BOOK_IDS)
+    if error:
+        return error
+
+    try:
+        liked = serializers.BooleanField().to_internal_value(request.data.get('liked', True))
+    except serializers.ValidationError:
+        return Response({'error': 'liked must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        changed = set_interactions(LIKE, request.user.pk, book_ids, active=liked)
+    except Exception as e:
+        logger.error(f"Error bulk-updating likes: {str(e)}", exc_info=True)
+        return Response(
+            {'error': 'Failed to update likes', 'detail': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return Response({
+        'liked': liked,
+        'changed': len(changed),
+        'like_counts': {str(book_id): count for book_id, count in changed.items()},
+    })
+
+
 # --- SEARCH SUGGESTIONS VIEW ---
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def search_suggestions(request):
-    """Get search suggestions"""
+    """Get typo-tolerant search suggestions from the trigram-indexed suggestion table"""
     query = request.GET.get('query', '').strip()
     if len(query) < 2:
         return Response({'suggestions': []})
-    
-    books = Book.objects.filter(
-        Q(title__icontains=query) | Q(author__icontains=query),
-        is_published=True
-    ).order_by('-view_count')[:10]
-    
+
     suggestions = []
-    
-    for book in books:
-        if query.lower() in book.title.lower():
-            suggestions.append({
-                'type': 'title',
-                'text': book.title,
-                'book_id': str(book.id)
-            })
-        elif query.lower() in book.author.name.lower():
-            suggestions.append({
-                'type': 'author',
-                'text': book.author.name,
-                'book_id': str(book.id)
-            })
-    
-    tag_suggestions = Book.objects.filter(
-        tags__icontains=query,
-        is_published=True
-    ).values_list('tags', flat=True).distinct()
-
-    unique_tags = set()
-    for tag_string in tag_suggestions:
-        if tag_string:
-            for tag in [t.strip() for t in tag_string.split(',')]:
-                if query.lower() in tag.lower():
-                    unique_tags.add(tag)
-    
-    for tag in list(unique_tags)[:5]:
-        suggestions.append({
-            'type': 'tag',
-            'text': tag
-        })
-    
-    return Response({'suggestions': suggestions[:10]})
+    for row in find_suggestions(query, limit=10):
+        suggestion = {'type': row['kind'], 'text': row['text']}
+        if row['book_id']:
+            suggestion['book_id'] = str(row['book_id'])
+        suggestions.append(suggestion)
+
+    return Response({'suggestions': suggestions})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -152,6 +152,17 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Day boundary for reading rollups and streaks (e.g. 'Africa/Kampala'). Changing it
+# re-buckets history: run `manage.py backfill_reading_rollups` afterwards.
+READING_TIME_ZONE = os.getenv('READING_TIME_ZONE', TIME_ZONE)
+
+# Open reading sessions with no heartbeat for this long are closed by `manage.py reap_reading_sessions`
+READING_SESSION_IDLE_MINUTES = int(os.getenv('READING_SESSION_IDLE_MINUTES', '30'))
+
+# Buffered book views wait this long for a flush before expiring; the hourly view rollup
+# re-aggregates as far back, so views flushed late are still counted
+VIEW_BUFFER_MAX_LATENESS_MINUTES = int(os.getenv('VIEW_BUFFER_MAX_LATENESS_MINUTES', str(60 * 24)))
+
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -0,0 +1,49 @@
+"""Per-user cache for the reading dashboard, versioned by a per-user generation."""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Every session, progress, like or bookmark write bumps the generation; book titles and
+# covers in the lists may lag by up to this long
+DASHBOARD_CACHE_TIMEOUT = 60 * 5
+# Must outlive the entries it versions; a lost generation restarts from the clock
+DASHBOARD_GENERATION_TIMEOUT = 60 * 60 * 24
+DASHBOARD_PERIODS = {'all', 'today', 'week', 'month', 'year'}
+
+
+def _generation_key(user_id):
+    return f'reading:dashboard-generation:{user_id}'
+
+
+def _fresh_generation():
+    return int(time.time() * 1000)
+
+
+def get_dashboard_generation(user_id):
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _fresh_generation(), timeout=DASHBOARD_GENERATION_TIMEOUT)
+        generation = cache.get(key) or _fresh_generation()
+    return generation
+
+
+def _bump(user_id):
+    key = _generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_generation(), timeout=DASHBOARD_GENERATION_TIMEOUT)
+
+
+def bump_dashboard_generation(user_id):
+    """Invalidate the user's cached dashboards once the current transaction commits."""
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def dashboard_cache_key(user_id, period):
+    # Unknown periods are served as 'all' by the view, so they share its entry
+    if period not in DASHBOARD_PERIODS:
+        period = 'all'
+    return f'reading:dashboard:{user_id}:{get_dashboard_generation(user_id)}:{period}'
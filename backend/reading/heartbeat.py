@@ -0,0 +1,197 @@
+"""Reader heartbeats: session duration, pages read and ReadingProgress in one statement."""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from catalog.models import Author, Book
+from .cache import bump_dashboard_generation
+from .models import ReadingProgress, ReadingSession, session_started_range
+from .rollups import get_reading_timezone_name, local_day_sql, rollup_upsert_sql
+from .serializers import ReadingSessionSerializer
+
+# At most one write per session per window; ticks inside it are parked in the cache
+HEARTBEAT_COALESCE_SECONDS = 10
+PENDING_HEARTBEAT_TIMEOUT = 60 * 60 * 6
+COMPLETION_PERCENT = 95.0
+
+
+def get_idle_window(idle_minutes=None):
+    """Longest gap between two activities of a session that still counts as reading."""
+    if idle_minutes is None:
+        idle_minutes = getattr(settings, 'READING_SESSION_IDLE_MINUTES', 30)
+    return timedelta(minutes=idle_minutes)
+
+
+def _state_key(session_id):
+    return f'reading:heartbeat:{session_id}'
+
+
+def _pending_key(session_id):
+    return f'reading:heartbeat-pending:{session_id}'
+
+
+def apply_heartbeat(session_id, user_id, current_page=None, percent=None, location=None, now=None):
+    """Write one heartbeat; the updated session (book and author attached), or None if not open."""
+    session_table = ReadingSession._meta.db_table
+    progress_table = ReadingProgress._meta.db_table
+    book_table = Book._meta.db_table
+    author_table = Author._meta.db_table
+    rollup_day, rollup_hour = local_day_sql('session.started_at')
+    # Prunes the partitioned session table to the partitions the id's time allows
+    started = session_started_range(session_id)
+    started_sql = 'AND s.started_at BETWEEN %(started_from)s AND %(started_to)s' if started else ''
+    sql = f"""
+        WITH prev AS (
+            SELECT s.id, s.user_id, s.book_id, s.started_at, s.duration_seconds, s.pages_read,
+                s.last_activity_at, b.pages
+            FROM {session_table} s
+            JOIN {book_table} b ON b.id = s.book_id
+            WHERE s.id = %(session_id)s AND s.user_id = %(user_id)s AND s.ended_at IS NULL {started_sql}
+            FOR UPDATE OF s
+        ), old_progress AS (
+            SELECT p.current_page
+            FROM {progress_table} p
+            JOIN prev ON p.user_id = prev.user_id AND p.book_id = prev.book_id
+        ), session AS (
+            UPDATE {session_table} s
+            SET duration_seconds = prev.duration_seconds + GREATEST(FLOOR(EXTRACT(EPOCH FROM LEAST(
+                    %(now)s::timestamptz - prev.last_activity_at, %(idle_window)s::interval
+                )))::integer, 0),
+                pages_read = s.pages_read + GREATEST(
+                    %(current_page)s::integer - (SELECT current_page FROM old_progress), 0
+                ),
+                last_activity_at = GREATEST(s.last_activity_at, %(now)s::timestamptz)
+            FROM prev
+            WHERE s.id = prev.id {started_sql}
+            RETURNING s.id, s.user_id, s.book_id, s.started_at, s.ended_at, s.duration_seconds,
+                s.pages_read, s.created_at,
+                s.duration_seconds - prev.duration_seconds AS time_delta,
+                s.pages_read - prev.pages_read AS pages_delta,
+                LEAST(GREATEST(CASE
+                    WHEN %(current_page)s::integer IS NOT NULL AND prev.pages > 0
+                        THEN %(current_page)s::integer * 100.0 / prev.pages
+                    ELSE %(percent)s::double precision
+                END, 0), 100) AS new_percent
+        ), progress AS (
+            INSERT INTO {progress_table} AS p (
+                id, user_id, book_id, last_location, current_page, percent, total_time_seconds,
+                completed, last_opened_at, created_at, updated_at
+            )
+            SELECT %(progress_id)s, session.user_id, session.book_id,
+                COALESCE(NULLIF(%(location)s::varchar, ''), '0'),
+                COALESCE(%(current_page)s::integer, 0),
+                COALESCE(session.new_percent, 0),
+                GREATEST(session.time_delta, 0),
+                COALESCE(session.new_percent, 0) >= %(completion)s,
+                %(now)s, %(now)s, %(now)s
+            FROM session
+            ON CONFLICT (user_id, book_id) DO UPDATE SET
+                last_location = COALESCE(NULLIF(%(location)s::varchar, ''), p.last_location),
+                current_page = COALESCE(%(current_page)s::integer, p.current_page),
+                percent = COALESCE((SELECT new_percent FROM session), p.percent),
+                completed = COALESCE((SELECT new_percent FROM session), p.percent) >= %(completion)s,
+                total_time_seconds = p.total_time_seconds + EXCLUDED.total_time_seconds,
+                last_opened_at = EXCLUDED.last_opened_at,
+                updated_at = EXCLUDED.updated_at
+        ), rollup AS (
+            {rollup_upsert_sql(f'''
+                SELECT session.user_id, {rollup_day}, GREATEST(session.time_delta, 0), session.pages_delta, 0,
+                    ARRAY[session.book_id]::bigint[],
+                    ARRAY(
+                        SELECT CASE WHEN g = {rollup_hour} THEN GREATEST(session.time_delta, 0) ELSE 0 END
+                        FROM generate_series(0, 23) AS g ORDER BY g
+                    )
+                FROM session
+                WHERE session.time_delta > 0 OR session.pages_delta > 0
+            ''')}
+        )
+        SELECT session.id, session.user_id, session.book_id, session.started_at, session.ended_at,
+            session.duration_seconds, session.pages_read, session.created_at,
+            b.title, a.id, a.name
+        FROM session
+        JOIN {book_table} b ON b.id = session.book_id
+        JOIN {author_table} a ON a.id = b.author_id
+    """
+    params = {
+        'session_id': session_id,
+        'user_id': user_id,
+        'current_page': current_page,
+        'percent': percent,
+        'location': location,
+        'now': now or timezone.now(),
+        'idle_window': get_idle_window(),
+        'progress_id': uuid.uuid4(),
+        'completion': COMPLETION_PERCENT,
+        'tz': get_reading_timezone_name(),
+        'started_from': started and started[0],
+        'started_to': started and started[1],
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    bump_dashboard_generation(user_id)
+
+    (pk, row_user_id, book_id, started_at, ended_at, duration_seconds, pages_read, created_at,
+     title, author_id, author_name) = row
+    session = ReadingSession(
+        id=pk, user_id=row_user_id, book_id=book_id, started_at=started_at, ended_at=ended_at,
+        duration_seconds=duration_seconds, pages_read=pages_read, created_at=created_at,
+    )
+    session.book = Book(id=book_id, title=title, author=Author(id=author_id, name=author_name))
+    return session
+
+
+def record_heartbeat(session_id, user, current_page=None, percent=None, location=None):
+    """Coalescing entry point for update_session_progress; serialized session data or None."""
+    now = timezone.now()
+    payload = {'current_page': current_page, 'percent': percent, 'location': location}
+    completing = percent is not None and percent >= COMPLETION_PERCENT
+
+    state = cache.get(_state_key(session_id))
+    if state is not None and state['user_id'] == user.pk and not completing:
+        # Parked with its own time, so a later flush dates the activity correctly
+        cache.set(_pending_key(session_id), dict(payload, now=now), timeout=PENDING_HEARTBEAT_TIMEOUT)
+        data = dict(state['data'])
+        # The state is younger than the idle window, so the time since it was written all counts
+        data['duration_seconds'] += max(int((now - state['written_at']).total_seconds()), 0)
+        return data
+
+    session = apply_heartbeat(session_id, user.pk, now=now, **payload)
+    if session is None:
+        return None
+    data = dict(ReadingSessionSerializer(session).data)
+    cache.delete(_pending_key(session_id))
+    # Fixed window: only writes set the state, so a steady stream of ticks cannot extend it
+    cache.set(_state_key(session_id), {
+        'user_id': user.pk,
+        'written_at': now,
+        'data': data,
+    }, timeout=HEARTBEAT_COALESCE_SECONDS)
+    return data
+
+
+def flush_pending_heartbeat(session_id, user_id):
+    """Apply a heartbeat still parked in the cache (call before closing the session)."""
+    payload = cache.get(_pending_key(session_id))
+    cache.delete_many([_state_key(session_id), _pending_key(session_id)])
+    if payload:
+        return apply_heartbeat(session_id, user_id, **payload)
+    return None
+
+
+def flush_pending_heartbeats(sessions):
+    """flush_pending_heartbeat for many (session_id, user_id) pairs with one cache read."""
+    keys = {_pending_key(session_id): (session_id, user_id) for session_id, user_id in sessions}
+    if not keys:
+        return
+    pending = cache.get_many(list(keys))
+    cache.delete_many([_state_key(session_id) for session_id, _ in keys.values()] + list(keys))
+    for key, payload in pending.items():
+        session_id, user_id = keys[key]
+        apply_heartbeat(session_id, user_id, **payload)
@@ -0,0 +1,105 @@
+"""Incremental highlight sync: rows changed since a cursor plus tombstones for deletes."""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Highlight, HighlightTombstone
+
+# A cursor older than this gets a full reset instead of a delta
+HIGHLIGHT_TOMBSTONE_DAYS = 90
+# Cursors are handed out slightly in the past, so a write that committed just after the
+# fetch (with an earlier updated_at) is sent again rather than missed. Clients upsert by id.
+HIGHLIGHT_CURSOR_OVERLAP = timedelta(seconds=5)
+
+
+def parse_page_range(value):
+    """'12-30' or '12' -> (first, last). Raises ValueError."""
+    first, _, last = value.partition('-')
+    first = int(first)
+    last = int(last) if last else first
+    if first < 1 or last < first:
+        raise ValueError(value)
+    return first, last
+
+
+def get_highlight_changes(user, book, since=None, pages=None):
+    """{'highlights', 'deleted', 'cursor', 'reset'} for changes since `since`, within optional pages."""
+    now = timezone.now()
+    highlights = Highlight.objects.filter(user=user, book=book)
+    if pages is not None:
+        highlights = highlights.filter(page_number__range=pages)
+    reset = since is None or since < now - timedelta(days=HIGHLIGHT_TOMBSTONE_DAYS)
+    deleted = []
+    if not reset:
+        highlights = highlights.filter(updated_at__gte=since)
+        deleted = list(
+            HighlightTombstone.objects.filter(user=user, book=book, deleted_at__gte=since)
+            .values_list('highlight_id', flat=True)
+        )
+    return {
+        'highlights': list(highlights.order_by('page_number', 'created_at')),
+        'deleted': deleted,
+        'cursor': now - HIGHLIGHT_CURSOR_OVERLAP,
+        'reset': reset,
+    }
+
+
+def delete_highlights(user_id, book_id, highlight_ids):
+    """Delete the user's highlights and leave tombstones, in one statement. Returns deleted ids."""
+    if not highlight_ids:
+        return []
+    highlight_table = Highlight._meta.db_table
+    tombstone_table = HighlightTombstone._meta.db_table
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH deleted AS (
+                DELETE FROM {highlight_table}
+                WHERE user_id = %(user_id)s AND book_id = %(book_id)s AND id = ANY(%(ids)s::uuid[])
+                RETURNING id
+            ), expired AS (
+                DELETE FROM {tombstone_table}
+                WHERE user_id = %(user_id)s AND book_id = %(book_id)s AND deleted_at < %(expired)s
+            )
+            INSERT INTO {tombstone_table} (highlight_id, user_id, book_id, deleted_at)
+            SELECT id, %(user_id)s, %(book_id)s, %(now)s FROM deleted
+            ON CONFLICT (highlight_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at
+            RETURNING highlight_id
+        """, {
+            'user_id': user_id,
+            'book_id': book_id,
+            'ids': [str(pk) for pk in highlight_ids],
+            'now': now,
+            'expired': now - timedelta(days=HIGHLIGHT_TOMBSTONE_DAYS),
+        })
+        return [row[0] for row in cursor.fetchall()]
+
+
+def apply_highlight_ops(user, book, create=(), update=(), delete=()):
+    """Apply HighlightBulkSerializer operations in one transaction; unknown ids go to 'not_found'."""
+    changes = {item['id']: item for item in update}
+    with transaction.atomic():
+        created = Highlight.objects.bulk_create([
+            Highlight(user=user, book=book, **data) for data in create
+        ])
+
+        updated = list(
+            Highlight.objects.select_for_update().filter(user=user, book=book, pk__in=changes)
+        )
+        fields = {'updated_at'}
+        now = timezone.now()
+        for highlight in updated:
+            for name, value in changes[highlight.pk].items():
+                if name != 'id':
+                    setattr(highlight, name, value)
+                    fields.add(name)
+            highlight.updated_at = now
+        if updated:
+            Highlight.objects.bulk_update(updated, sorted(fields))
+
+        deleted = delete_highlights(user.pk, book.pk, list(delete))
+
+    found = {highlight.pk for highlight in updated} | set(deleted)
+    not_found = [pk for pk in [*changes, *delete] if pk not in found]
+    return {'created': created, 'updated': updated, 'deleted': deleted, 'not_found': not_found}
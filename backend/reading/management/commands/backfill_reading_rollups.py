@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from reading.rollups import rebuild_reading_days
+from reading.streaks import rebuild_reading_streaks
+
+
+class Command(BaseCommand):
+    help = "Rebuild ReadingDay and ReadingStreak from ReadingSession history (all users, or --user-id)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', action='append', dest='user_ids',
+                            help='Only rebuild this user (repeatable).')
+
+    def handle(self, *args, **options):
+        days = rebuild_reading_days(options['user_ids'])
+        streaks = rebuild_reading_streaks(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {days} reading day row(s) and {streaks} streak(s)."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from reading.reaper import close_idle_sessions
+
+
+class Command(BaseCommand):
+    help = "Close reading sessions left open with no recent activity. Schedule every few minutes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idle-minutes', type=int, default=None,
+                            help='Idle window (default: settings.READING_SESSION_IDLE_MINUTES).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Sessions closed per round.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            closed = close_idle_sessions(options['idle_minutes'], batch_size=options['batch_size'])
+            total += closed
+            if closed < options['batch_size']:
+                break
+        self.stdout.write(self.style.SUCCESS(f"Closed {total} idle reading session(s)."))
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:42
+
+from django.conf import settings
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import reading.models
+
+
+def backfill_reading_days(apps, schema_editor):
+    # Frozen copy of reading.rollups.rebuild_reading_days at the time of this migration
+    day_table = apps.get_model('reading', 'ReadingDay')._meta.db_table
+    session_table = apps.get_model('reading', 'ReadingSession')._meta.db_table
+    local = "(started_at AT TIME ZONE %(tz)s)"
+    tz = getattr(settings, 'READING_TIME_ZONE', settings.TIME_ZONE)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH s AS (
+                SELECT user_id, book_id, GREATEST(duration_seconds, 0) AS seconds,
+                    GREATEST(pages_read, 0) AS pages, {local}::date AS day,
+                    EXTRACT(HOUR FROM {local})::integer AS hour
+                FROM {session_table}
+            ), hours AS (
+                SELECT user_id, day, hour, SUM(seconds) AS seconds FROM s GROUP BY user_id, day, hour
+            )
+            INSERT INTO {day_table} (
+                user_id, day, seconds, pages, sessions, books, book_ids, hourly_seconds, updated_at
+            )
+            SELECT s.user_id, s.day, SUM(s.seconds), SUM(s.pages), COUNT(*),
+                COUNT(DISTINCT s.book_id), array_agg(DISTINCT s.book_id),
+                (
+                    SELECT array_agg(COALESCE(hours.seconds, 0)::integer ORDER BY g)
+                    FROM generate_series(0, 23) AS g
+                    LEFT JOIN hours ON hours.user_id = s.user_id AND hours.day = s.day AND hours.hour = g
+                ),
+                now()
+            FROM s
+            GROUP BY s.user_id, s.day
+        """, {'tz': tz})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reading', '0004_readingsession_pages_read'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('seconds', models.PositiveIntegerField(default=0, help_text='Seconds read in sessions started this day.')),
+                ('pages', models.PositiveIntegerField(default=0, help_text='Pages read in sessions started this day.')),
+                ('sessions', models.PositiveIntegerField(default=0, help_text='Sessions started this day.')),
+                ('books', models.PositiveIntegerField(default=0, help_text='Distinct books opened this day.')),
+                ('book_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, help_text='Distinct books opened this day (backs the books count).', size=None)),
+                ('hourly_seconds', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=reading.models.empty_hours, help_text='Seconds read per hour of the day, by session start hour.', size=24)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reading_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Reading Days',
+                'ordering': ['-day'],
+                'unique_together': {('user', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_reading_days, migrations.RunPython.noop),
+    ]
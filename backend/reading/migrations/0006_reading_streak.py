@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_reading_streaks(apps, schema_editor):
+    # Frozen copy of reading.streaks.rebuild_reading_streaks at the time of this migration,
+    # reading the ReadingDay rows migration 0005 filled
+    streak_table = apps.get_model('reading', 'ReadingStreak')._meta.db_table
+    day_table = apps.get_model('reading', 'ReadingDay')._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH days AS (
+                SELECT user_id, day,
+                    day - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day))::integer AS run
+                FROM {day_table}
+                WHERE sessions > 0
+            ), runs AS (
+                SELECT user_id, MIN(day) AS first_day, MAX(day) AS last_day, COUNT(*) AS days
+                FROM days
+                GROUP BY user_id, run
+            )
+            INSERT INTO {streak_table} (user_id, current_start, last_active, longest_days, updated_at)
+            SELECT DISTINCT ON (user_id) user_id, first_day, last_day,
+                MAX(days) OVER (PARTITION BY user_id), now()
+            FROM runs
+            ORDER BY user_id, last_day DESC
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_registration_number_user_session_token_and_more'),
+        ('reading', '0005_reading_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingStreak',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reading_streak', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('current_start', models.DateField(help_text='First day of the run ending on last_active.')),
+                ('last_active', models.DateField(help_text='Latest day with a reading session.')),
+                ('longest_days', models.PositiveIntegerField(default=0, help_text='Longest run of consecutive reading days.')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Reading Streaks',
+            },
+        ),
+        migrations.RunPython(backfill_reading_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading', '0006_reading_streak'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='readingsession',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Last heartbeat or synced event; idle open sessions are closed from here.'),
+        ),
+        # Best estimate for existing rows: the end, or the last duration a heartbeat wrote
+        migrations.RunSQL(
+            "UPDATE reading_readingsession SET last_activity_at = COALESCE("
+            "ended_at, started_at + GREATEST(duration_seconds, 0) * interval '1 second')",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='readingsession',
+            index=models.Index(condition=models.Q(('ended_at__isnull', True)), fields=['user', 'book'], name='reading_session_open'),
+        ),
+        migrations.AddIndex(
+            model_name='readingsession',
+            index=models.Index(condition=models.Q(('ended_at__isnull', True)), fields=['last_activity_at'], name='reading_session_open_activity'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_bookmark_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reading', '0007_reading_session_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HighlightTombstone',
+            fields=[
+                ('highlight_id', models.UUIDField(help_text='ID of the deleted highlight.', primary_key=True, serialize=False)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Highlight Tombstones',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='highlight',
+            name='reading_hig_user_id_1dbad5_idx',
+        ),
+        migrations.AddIndex(
+            model_name='highlight',
+            index=models.Index(fields=['user', 'book', 'page_number'], name='reading_hig_user_id_717eb7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='highlight',
+            index=models.Index(fields=['user', 'book', 'updated_at'], name='reading_hig_user_id_23b3fa_idx'),
+        ),
+        migrations.AddField(
+            model_name='highlighttombstone',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='highlight_tombstones', to='catalog.book'),
+        ),
+        migrations.AddField(
+            model_name='highlighttombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='highlight_tombstones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='highlighttombstone',
+            index=models.Index(fields=['user', 'book', 'deleted_at'], name='reading_hig_user_id_b1c7a8_idx'),
+        ),
+    ]
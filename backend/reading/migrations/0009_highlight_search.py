@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:51
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading', '0008_highlight_sync'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='highlight',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('text_content', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('note', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), name='reading_highlight_search_gin'),
+        ),
+    ]
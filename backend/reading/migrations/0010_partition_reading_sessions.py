@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:40
+
+from django.db import migrations
+
+from analytics.migrations._partitioning import partition_table, unpartition_table
+
+
+def partition_sessions(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        partition_table(cursor, 'reading_readingsession', 'started_at')
+
+
+def unpartition_sessions(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        unpartition_table(cursor, 'reading_readingsession')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading', '0009_highlight_search'),
+    ]
+
+    # Monthly range partitions (see analytics.partitions), with the DDL frozen in
+    # analytics.migrations._partitioning. The model state does not change.
+    operations = [
+        migrations.RunPython(partition_sessions, unpartition_sessions),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:27
+
+from django.db import migrations, models
+import reading.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading', '0010_partition_reading_sessions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='readingsession',
+            name='id',
+            field=models.UUIDField(default=reading.models.session_uuid, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -1,7 +1,14 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+import time
 import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+
+from .search import highlight_search_vector
 
 # Get the custom User model (assuming it's in the accounts app or default)
 User = get_user_model()
@@ -87,12 +94,48 @@ class ReadingProgress(models.Model):
         return f"Progress: {self.user} -> {book_title} ({self.percent:.2f}%)"
 
 
+# started_at of a session is within this of the time in its id (see session_uuid)
+SESSION_ID_SLACK = timedelta(days=1)
+
+
+def session_uuid():
+    """Random UUID led by the creation time in ms (UUIDv7 layout), so a session id dates its row."""
+    value = (int(time.time() * 1000) << 80) | (uuid.uuid4().int & ((1 << 80) - 1))
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+def session_started_range(session_id):
+    """(earliest, latest) started_at for a session id, or None if the id predates session_uuid."""
+    try:
+        value = session_id if isinstance(session_id, uuid.UUID) else uuid.UUID(str(session_id))
+    except ValueError:
+        return None
+    if value.version != 7:
+        return None
+    created = datetime.fromtimestamp((value.int >> 80) / 1000, tz=dt_timezone.utc)
+    return created - SESSION_ID_SLACK, created + SESSION_ID_SLACK
+
+
+def session_started_filter(session_ids):
+    """started_at bounds covering session_ids, so a lookup by id only probes their partitions."""
+    ranges = [session_started_range(session_id) for session_id in session_ids]
+    if not ranges or None in ranges:
+        return {}
+    return {
+        'started_at__gte': min(earliest for earliest, _ in ranges),
+        'started_at__lte': max(latest for _, latest in ranges),
+    }
+
+
 class ReadingSession(models.Model):
     """
     Reading session tracking model.
     Tracks individual reading periods for a book.
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Time-led ids let id lookups carry started_at bounds for partition pruning
+    id = models.UUIDField(primary_key=True, default=session_uuid, editable=False)
     
     # ForeignKey to User (CASCADE on delete)
     user = models.ForeignKey(
@@ -128,12 +171,24 @@ class ReadingSession(models.Model):
         default=0,
         help_text="Number of pages read during this session."
     )
+
+    last_activity_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Last heartbeat or synced event; idle open sessions are closed from here."
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name_plural = "Reading Sessions"
         ordering = ['-started_at']
+        indexes = [
+            # Open sessions only: the active-session lookup and the idle reaper stay index seeks
+            models.Index(fields=['user', 'book'], name='reading_session_open',
+                         condition=models.Q(ended_at__isnull=True)),
+            models.Index(fields=['last_activity_at'], name='reading_session_open_activity',
+                         condition=models.Q(ended_at__isnull=True)),
+        ]
 
     def __str__(self):
         book_title = self.book.title if hasattr(self.book, 'title') else "N/A"
@@ -197,11 +252,123 @@ class Highlight(models.Model):
         verbose_name_plural = "Highlights"
         ordering = ['page_number', 'created_at']
         indexes = [
-            models.Index(fields=['user', 'book']),
+            # Page-range fetch and delta sync for one reader (see reading.highlights)
+            models.Index(fields=['user', 'book', 'page_number']),
+            models.Index(fields=['user', 'book', 'updated_at']),
             models.Index(fields=['book', 'page_number']),
+            # Expression index: search queries must use this same vector (see reading.search)
+            GinIndex(highlight_search_vector(), name='reading_highlight_search_gin'),
         ]
     
     def __str__(self):
         book_title = self.book.title if hasattr(self.book, 'title') else "N/A"
         preview = self.text_content[:50] + "..." if len(self.text_content) > 50 else self.text_content
-        return f"Highlight: {self.user} -> {book_title} (p{self.page_number}): {preview}"
\ No newline at end of file
+        return f"Highlight: {self.user} -> {book_title} (p{self.page_number}): {preview}"
+
+
+class HighlightTombstone(models.Model):
+    """
+    Record of a deleted highlight, so delta sync can tell readers to drop it.
+    Kept for HIGHLIGHT_TOMBSTONE_DAYS (see reading.highlights).
+    """
+    highlight_id = models.UUIDField(primary_key=True, help_text="ID of the deleted highlight.")
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='highlight_tombstones'
+    )
+
+    book = models.ForeignKey(
+        'catalog.Book',
+        on_delete=models.CASCADE,
+        related_name='highlight_tombstones'
+    )
+
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Highlight Tombstones"
+        indexes = [
+            models.Index(fields=['user', 'book', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Deleted highlight {self.highlight_id} ({self.deleted_at})"
+
+
+def empty_hours():
+    return [0] * 24
+
+
+class ReadingDay(models.Model):
+    """
+    Per-user daily reading rollup, maintained incrementally by reading.rollups.
+    Sessions are attributed to the day and hour they started in.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reading_days'
+    )
+
+    day = models.DateField()
+
+    seconds = models.PositiveIntegerField(default=0, help_text="Seconds read in sessions started this day.")
+    pages = models.PositiveIntegerField(default=0, help_text="Pages read in sessions started this day.")
+    sessions = models.PositiveIntegerField(default=0, help_text="Sessions started this day.")
+    books = models.PositiveIntegerField(default=0, help_text="Distinct books opened this day.")
+
+    book_ids = ArrayField(
+        models.BigIntegerField(),
+        default=list,
+        help_text="Distinct books opened this day (backs the books count)."
+    )
+
+    hourly_seconds = ArrayField(
+        models.IntegerField(),
+        size=24,
+        default=empty_hours,
+        help_text="Seconds read per hour of the day, by session start hour."
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'day')
+        verbose_name_plural = "Reading Days"
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.user} on {self.day}: {self.seconds}s, {self.pages} pages"
+
+
+class ReadingStreak(models.Model):
+    """
+    Per-user reading streak state, advanced in O(1) as sessions start (see reading.streaks).
+    Days are in settings.READING_TIME_ZONE.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='reading_streak'
+    )
+
+    current_start = models.DateField(help_text="First day of the run ending on last_active.")
+    last_active = models.DateField(help_text="Latest day with a reading session.")
+    longest_days = models.PositiveIntegerField(default=0, help_text="Longest run of consecutive reading days.")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Reading Streaks"
+
+    def __str__(self):
+        return f"{self.user}: {self.current_start} to {self.last_active} (longest {self.longest_days})"
+
+    def current_days(self, today):
+        """Length of the current run; it survives until the end of the day after last_active."""
+        if self.last_active < today - timedelta(days=1):
+            return 0
+        return (self.last_active - self.current_start).days + 1
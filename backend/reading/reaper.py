@@ -0,0 +1,76 @@
+"""Closing abandoned reading sessions (schedule `manage.py reap_reading_sessions`)."""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import bump_dashboard_generation
+from .heartbeat import flush_pending_heartbeats, get_idle_window
+from .models import ReadingSession, session_started_filter
+from .rollups import record_reading_activity
+
+
+def get_idle_cutoff(idle_minutes=None):
+    return timezone.now() - get_idle_window(idle_minutes)
+
+
+def close_idle_sessions(idle_minutes=None, batch_size=1000):
+    """Close up to batch_size open sessions idle for longer than idle_minutes. Returns the number closed."""
+    # They end at their last activity, which heartbeats and sync already credited
+    table = ReadingSession._meta.db_table
+    cutoff = get_idle_cutoff(idle_minutes)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # SKIP LOCKED: a session mid-heartbeat is not idle, and concurrent reapers split the work
+            cursor.execute(f"""
+                SELECT id, user_id FROM {table}
+                WHERE ended_at IS NULL AND last_activity_at < %(cutoff)s
+                ORDER BY last_activity_at
+                LIMIT %(batch_size)s
+                FOR UPDATE SKIP LOCKED
+            """, {'cutoff': cutoff, 'batch_size': batch_size})
+            stale = cursor.fetchall()
+        return close_sessions(stale)
+
+
+def close_sessions(sessions, ended_at=None):
+    """Close [(session_id, user_id)] at ended_at (credited like a heartbeat) or their last activity."""
+    if not sessions:
+        return 0
+    # A heartbeat still parked in the cache is applied (at its own time) before closing
+    flush_pending_heartbeats(sessions)
+
+    table = ReadingSession._meta.db_table
+    started = session_started_filter([pk for pk, _ in sessions])
+    started_sql = 'AND s.started_at BETWEEN %(started_from)s AND %(started_to)s' if started else ''
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH closed AS (
+                SELECT id, GREATEST(FLOOR(EXTRACT(EPOCH FROM LEAST(
+                    COALESCE(%(ended_at)s::timestamptz, last_activity_at) - last_activity_at,
+                    %(idle_window)s::interval
+                )))::integer, 0) AS credited
+                FROM {table} s
+                WHERE id = ANY(%(ids)s::uuid[]) AND ended_at IS NULL {started_sql}
+            )
+            UPDATE {table} AS s SET
+                ended_at = COALESCE(%(ended_at)s::timestamptz, s.last_activity_at),
+                duration_seconds = s.duration_seconds + closed.credited,
+                last_activity_at = GREATEST(s.last_activity_at, COALESCE(%(ended_at)s::timestamptz, s.last_activity_at))
+            FROM closed
+            WHERE s.id = closed.id {started_sql}
+            RETURNING s.user_id, s.book_id, s.started_at, closed.credited
+        """, {
+            'ids': [str(pk) for pk, _ in sessions],
+            'ended_at': ended_at,
+            'idle_window': get_idle_window(),
+            'started_from': started.get('started_at__gte'),
+            'started_to': started.get('started_at__lte'),
+        })
+        closed = cursor.fetchall()
+
+    record_reading_activity(
+        {'user_id': user_id, 'book_id': book_id, 'started_at': started_at, 'seconds': credited}
+        for user_id, book_id, started_at, credited in closed if credited
+    )
+    for user_id in {row[0] for row in closed}:
+        bump_dashboard_generation(user_id)
+    return len(closed)
@@ -0,0 +1,130 @@
+"""Incremental per-user daily reading rollups (ReadingDay), by local start day and hour."""
+import zoneinfo
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ReadingDay, ReadingSession, empty_hours
+
+
+def get_reading_timezone_name():
+    return getattr(settings, 'READING_TIME_ZONE', settings.TIME_ZONE)
+
+
+def get_reading_timezone():
+    return zoneinfo.ZoneInfo(get_reading_timezone_name())
+
+
+def reading_localtime(value):
+    return timezone.localtime(value, get_reading_timezone())
+
+
+def reading_today():
+    """Today in the reading time zone; the 'today' every rollup and streak is relative to."""
+    return reading_localtime(timezone.now()).date()
+
+
+def rollup_upsert_sql(source):
+    """Upsert adding `source` rows (user_id, day, seconds, pages, sessions, book_ids, hourly_seconds)."""
+    table = ReadingDay._meta.db_table
+    return f"""
+        INSERT INTO {table} AS d (
+            user_id, day, seconds, pages, sessions, books, book_ids, hourly_seconds, updated_at
+        )
+        SELECT src.user_id, src.day, src.seconds, src.pages, src.sessions,
+            cardinality(src.book_ids), src.book_ids, src.hourly_seconds, now()
+        FROM ({source}) AS src (user_id, day, seconds, pages, sessions, book_ids, hourly_seconds)
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            seconds = d.seconds + EXCLUDED.seconds,
+            pages = d.pages + EXCLUDED.pages,
+            sessions = d.sessions + EXCLUDED.sessions,
+            book_ids = ARRAY(SELECT DISTINCT unnest(d.book_ids || EXCLUDED.book_ids)),
+            books = cardinality(ARRAY(SELECT DISTINCT unnest(d.book_ids || EXCLUDED.book_ids))),
+            hourly_seconds = ARRAY(
+                SELECT COALESCE(a, 0) + COALESCE(b, 0)
+                FROM unnest(d.hourly_seconds, EXCLUDED.hourly_seconds) WITH ORDINALITY AS h (a, b, n)
+                ORDER BY n
+            ),
+            updated_at = EXCLUDED.updated_at
+    """
+
+
+def local_day_sql(column, tz_param='tz'):
+    """SQL for the local day and hour of a timestamptz column, for use in rollup sources."""
+    local = f"({column} AT TIME ZONE %({tz_param})s)"
+    return f"{local}::date", f"EXTRACT(HOUR FROM {local})::integer"
+
+
+def record_reading_activity(activities):
+    """Add signed seconds/pages/sessions deltas (keyed by user_id, book_id, started_at) in one statement."""
+    merged = {}
+    for activity in activities:
+        started_at = reading_localtime(activity['started_at'])
+        key = (activity['user_id'], started_at.date())
+        row = merged.setdefault(key, {
+            'seconds': 0, 'pages': 0, 'sessions': 0, 'book_ids': set(), 'hourly_seconds': empty_hours(),
+        })
+        seconds = activity.get('seconds', 0)
+        row['seconds'] += seconds
+        row['pages'] += activity.get('pages', 0)
+        row['sessions'] += activity.get('sessions', 0)
+        row['book_ids'].add(activity['book_id'])
+        row['hourly_seconds'][started_at.hour] += seconds
+
+    if not merged:
+        return
+
+    values = []
+    params = []
+    for (user_id, day), row in merged.items():
+        values.append('(%s::uuid, %s::date, %s::integer, %s::integer, %s::integer, %s::bigint[], %s::integer[])')
+        params.extend([
+            user_id, day, row['seconds'], row['pages'], row['sessions'],
+            sorted(row['book_ids']), row['hourly_seconds'],
+        ])
+    with connection.cursor() as cursor:
+        cursor.execute(rollup_upsert_sql('VALUES ' + ', '.join(values)), params)
+
+
+def rebuild_reading_days(user_ids=None):
+    """Recompute ReadingDay from ReadingSession (all users, or only user_ids). Returns rows written."""
+    day_table = ReadingDay._meta.db_table
+    session_table = ReadingSession._meta.db_table
+    day, hour = local_day_sql('started_at')
+    user_filter = '' if user_ids is None else 'WHERE user_id = ANY(%(user_ids)s::uuid[])'
+    params = {'tz': get_reading_timezone_name(), 'user_ids': [str(pk) for pk in user_ids or []]}
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {day_table} {user_filter}", params)
+        cursor.execute(f"""
+            WITH s AS (
+                SELECT user_id, book_id, GREATEST(duration_seconds, 0) AS seconds,
+                    GREATEST(pages_read, 0) AS pages, {day} AS day, {hour} AS hour
+                FROM {session_table}
+                {user_filter}
+            ), hours AS (
+                SELECT user_id, day, hour, SUM(seconds) AS seconds FROM s GROUP BY user_id, day, hour
+            )
+            INSERT INTO {day_table} (
+                user_id, day, seconds, pages, sessions, books, book_ids, hourly_seconds, updated_at
+            )
+            SELECT s.user_id, s.day, SUM(s.seconds), SUM(s.pages), COUNT(*),
+                COUNT(DISTINCT s.book_id), array_agg(DISTINCT s.book_id),
+                (
+                    SELECT array_agg(COALESCE(hours.seconds, 0)::integer ORDER BY g)
+                    FROM generate_series(0, 23) AS g
+                    LEFT JOIN hours ON hours.user_id = s.user_id AND hours.day = s.day AND hours.hour = g
+                ),
+                now()
+            FROM s
+            GROUP BY s.user_id, s.day
+        """, params)
+        return cursor.rowcount
+
+
+def get_reading_days(user, start_day, end_day=None):
+    """{day: ReadingDay} for user from start_day up to end_day (open-ended if None), inclusive."""
+    days = ReadingDay.objects.filter(user=user, day__gte=start_day)
+    if end_day is not None:
+        days = days.filter(day__lte=end_day)
+    return {row.day: row for row in days}
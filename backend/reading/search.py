@@ -0,0 +1,47 @@
+"""Full-text search over a user's highlights and notes."""
+from django.contrib.postgres.search import SearchHeadline, SearchRank, SearchVector
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from catalog.search import SEARCH_CONFIG, SEARCH_RANK_FIELD, build_search_query
+
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+
+
+# The GIN index on Highlight is built on this expression, so nothing stored has to be synced
+def highlight_search_vector():
+    return (
+        SearchVector('text_content', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('note', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def _snippet(field, query):
+    return SearchHeadline(
+        field, query, config=SEARCH_CONFIG, start_sel=SNIPPET_START, stop_sel=SNIPPET_STOP,
+    )
+
+
+def search_highlights(user, text, book_id=None):
+    """The user's highlights matching `text`, best first, with `snippet` / `note_snippet` excerpts."""
+    from .models import Highlight
+
+    highlights = Highlight.objects.filter(user=user)
+    if book_id is not None:
+        highlights = highlights.filter(book_id=book_id)
+    query = build_search_query(text)
+    if query is None:
+        return highlights.none()
+    vector = highlight_search_vector()
+    return (
+        highlights.annotate(search=vector)
+        .filter(search=query)
+        .annotate(**{
+            SEARCH_RANK_FIELD: Cast(SearchRank(vector, query), FloatField()),
+            'snippet': _snippet('text_content', query),
+            'note_snippet': _snippet('note', query),
+        })
+        .select_related('book')
+        .order_by(f'-{SEARCH_RANK_FIELD}', '-created_at', 'pk')
+    )
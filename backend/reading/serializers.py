@@ -47,6 +47,22 @@ class ReadingSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class ProgressEventSerializer(serializers.Serializer):
+    """One queued reader event replayed through the batch sync endpoint"""
+    book_id = serializers.IntegerField()
+    session_id = serializers.UUIDField(required=False, allow_null=True)
+    timestamp = serializers.DateTimeField()
+    current_page = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+    percent = serializers.FloatField(required=False, allow_null=True, min_value=0, max_value=100)
+    location = serializers.CharField(required=False, allow_null=True, allow_blank=True, max_length=255)
+    time_spent = serializers.IntegerField(required=False, default=0, min_value=0, max_value=60 * 60)
+
+
+class ProgressSyncSerializer(serializers.Serializer):
+    """Ordered batch of reader events (see reading.sync)"""
+    events = ProgressEventSerializer(many=True, allow_empty=False, max_length=500)
+
+
 class ReadingStatsSerializer(serializers.Serializer):
     """Reading statistics serializer"""
     total_books_read = serializers.IntegerField()
@@ -90,3 +106,53 @@ class HighlightSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Page number must be at least 1")
         return value
 
+
+class HighlightSearchResultSerializer(serializers.ModelSerializer):
+    """One highlight search hit (see reading.search)"""
+    book_title = serializers.CharField(source='book.title', read_only=True)
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    note_snippet = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Highlight
+        fields = [
+            'id', 'book', 'book_title', 'page_number', 'color', 'snippet', 'note_snippet',
+            'rank', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+MAX_HIGHLIGHT_BULK_OPS = 500
+
+
+class HighlightWriteSerializer(HighlightSerializer):
+    """Highlight fields a bulk request may set (the book comes from the URL)"""
+
+    class Meta(HighlightSerializer.Meta):
+        fields = ['page_number', 'text_content', 'color', 'position_data', 'note']
+
+
+class HighlightUpdateSerializer(HighlightWriteSerializer):
+    """Partial update of one highlight inside a bulk request"""
+    id = serializers.UUIDField()
+
+    class Meta(HighlightWriteSerializer.Meta):
+        fields = ['id'] + HighlightWriteSerializer.Meta.fields
+        extra_kwargs = {name: {'required': False} for name in HighlightWriteSerializer.Meta.fields}
+
+
+class HighlightBulkSerializer(serializers.Serializer):
+    """Creates, updates and deletes for one book, applied together (see reading.highlights)"""
+    create = HighlightWriteSerializer(many=True, required=False)
+    update = HighlightUpdateSerializer(many=True, required=False)
+    delete = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+    def validate(self, attrs):
+        operations = sum(len(attrs.get(name, [])) for name in ('create', 'update', 'delete'))
+        if not operations:
+            raise serializers.ValidationError("At least one create, update or delete is required")
+        if operations > MAX_HIGHLIGHT_BULK_OPS:
+            raise serializers.ValidationError(f"At most {MAX_HIGHLIGHT_BULK_OPS} operations per request")
+        return attrs
+
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from catalog.interactions import interactions_changed
+from catalog.models import BookLike, Bookmark
+from .cache import bump_dashboard_generation
+from .models import ReadingProgress, ReadingSession, session_started_filter
+from .rollups import record_reading_activity
+from .streaks import record_reading_day
+
+
+# --- ReadingDay rollup maintenance (ORM saves; raw-SQL paths feed reading.rollups directly) ---
+@receiver(pre_save, sender=ReadingSession)
+def session_pre_save_rollup(sender, instance, **kwargs):
+    """Remember the stored duration and pages so post_save can roll up only the delta."""
+    previous = None
+    if not instance._state.adding:
+        previous = ReadingSession.objects.filter(
+            pk=instance.pk, **session_started_filter([instance.pk])
+        ).values('duration_seconds', 'pages_read').first()
+    instance._previous_duration = previous['duration_seconds'] if previous else 0
+    instance._previous_pages = previous['pages_read'] if previous else 0
+
+
+@receiver(post_save, sender=ReadingSession)
+def session_rollup_saved(sender, instance, created, **kwargs):
+    seconds = instance.duration_seconds - getattr(instance, '_previous_duration', 0)
+    pages = instance.pages_read - getattr(instance, '_previous_pages', 0)
+    if created or seconds or pages:
+        record_reading_activity([{
+            'user_id': instance.user_id,
+            'book_id': instance.book_id,
+            'started_at': instance.started_at,
+            'seconds': seconds,
+            'pages': pages,
+            'sessions': 1 if created else 0,
+        }])
+
+
+# --- ReadingStreak maintenance ---
+@receiver(post_save, sender=ReadingSession)
+def session_streak_saved(sender, instance, created, **kwargs):
+    if created:
+        record_reading_day(instance.user_id, instance.started_at)
+
+
+# --- Dashboard cache invalidation (raw-SQL paths bump reading.cache directly) ---
+@receiver(post_save, sender=ReadingSession)
+@receiver(post_delete, sender=ReadingSession)
+@receiver(post_save, sender=ReadingProgress)
+@receiver(post_delete, sender=ReadingProgress)
+@receiver(post_save, sender=BookLike)
+@receiver(post_delete, sender=BookLike)
+@receiver(post_save, sender=Bookmark)
+@receiver(post_delete, sender=Bookmark)
+def user_reading_changed(sender, instance, **kwargs):
+    bump_dashboard_generation(instance.user_id)
+
+
+@receiver(interactions_changed)
+def user_interactions_changed(sender, user_id, **kwargs):
+    bump_dashboard_generation(user_id)
@@ -0,0 +1,64 @@
+"""Stored reading streaks (ReadingStreak), advanced with one upsert per session start."""
+from django.db import connection, transaction
+
+from .models import ReadingDay, ReadingStreak
+from .rollups import reading_localtime
+
+
+def record_reading_day(user_id, started_at):
+    """Advance the user's streak for a session started at started_at."""
+    table = ReadingStreak._meta.db_table
+    # A day before last_active (an offline replay) leaves the streak as is until a rebuild
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {table} AS s (user_id, current_start, last_active, longest_days, updated_at)
+            VALUES (%(user_id)s, %(day)s, %(day)s, 1, now())
+            ON CONFLICT (user_id) DO UPDATE SET
+                current_start = CASE
+                    WHEN s.last_active >= EXCLUDED.last_active - 1 THEN s.current_start
+                    ELSE EXCLUDED.current_start
+                END,
+                last_active = GREATEST(s.last_active, EXCLUDED.last_active),
+                longest_days = GREATEST(s.longest_days, CASE
+                    WHEN s.last_active >= EXCLUDED.last_active - 1
+                        THEN GREATEST(s.last_active, EXCLUDED.last_active) - s.current_start + 1
+                    ELSE 1
+                END),
+                updated_at = EXCLUDED.updated_at
+        """, {'user_id': user_id, 'day': reading_localtime(started_at).date()})
+
+
+def rebuild_reading_streaks(user_ids=None):
+    """Recompute ReadingStreak from ReadingDay (all users, or only user_ids). Returns rows written."""
+    streak_table = ReadingStreak._meta.db_table
+    day_table = ReadingDay._meta.db_table
+    user_filter = '' if user_ids is None else 'AND user_id = ANY(%(user_ids)s::uuid[])'
+    params = {'user_ids': [str(pk) for pk in user_ids or []]}
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {streak_table} WHERE TRUE {user_filter}", params)
+        cursor.execute(f"""
+            WITH days AS (
+                SELECT user_id, day,
+                    day - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day))::integer AS run
+                FROM {day_table}
+                WHERE sessions > 0 {user_filter}
+            ), runs AS (
+                SELECT user_id, MIN(day) AS first_day, MAX(day) AS last_day, COUNT(*) AS days
+                FROM days
+                GROUP BY user_id, run
+            )
+            INSERT INTO {streak_table} (user_id, current_start, last_active, longest_days, updated_at)
+            SELECT DISTINCT ON (user_id) user_id, first_day, last_day,
+                MAX(days) OVER (PARTITION BY user_id), now()
+            FROM runs
+            ORDER BY user_id, last_day DESC
+        """, params)
+        return cursor.rowcount
+
+
+def get_streak_days(user, today):
+    """(current, longest) streak lengths in days for user, as of today."""
+    streak = ReadingStreak.objects.filter(user=user).first()
+    if streak is None:
+        return 0, 0
+    return streak.current_days(today), streak.longest_days
@@ -0,0 +1,160 @@
+"""Batch replay of reader events queued while offline, in a fixed number of queries."""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from catalog.models import Book
+from .cache import bump_dashboard_generation
+from .heartbeat import COMPLETION_PERCENT
+from .models import ReadingProgress, ReadingSession, session_started_filter
+from .rollups import record_reading_activity
+
+PROGRESS_UPDATE_FIELDS = [
+    'last_location', 'current_page', 'percent', 'total_time_seconds',
+    'completed', 'last_opened_at', 'updated_at',
+]
+
+
+def _insert_progress(rows, now):
+    """Insert new ReadingProgress rows in one statement, adding to rows created meanwhile."""
+    if not rows:
+        return
+    table = ReadingProgress._meta.db_table
+    values = []
+    params = []
+    for progress in rows:
+        values.append('(%s::uuid, %s::uuid, %s::bigint, %s, %s::integer, %s::double precision, %s::integer, %s, %s, %s, %s)')
+        params.extend([
+            progress.pk, progress.user_id, progress.book_id, progress.last_location, progress.current_page,
+            progress.percent, progress.total_time_seconds, progress.completed, now, now, now,
+        ])
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {table} AS p (
+                id, user_id, book_id, last_location, current_page, percent, total_time_seconds,
+                completed, last_opened_at, created_at, updated_at
+            )
+            VALUES {', '.join(values)}
+            ON CONFLICT (user_id, book_id) DO UPDATE SET
+                last_location = EXCLUDED.last_location,
+                current_page = EXCLUDED.current_page,
+                percent = EXCLUDED.percent,
+                completed = EXCLUDED.completed,
+                total_time_seconds = p.total_time_seconds + EXCLUDED.total_time_seconds,
+                last_opened_at = EXCLUDED.last_opened_at,
+                updated_at = EXCLUDED.updated_at
+            RETURNING book_id, id, total_time_seconds, created_at
+        """, params)
+        stored = {book_id: row for book_id, *row in cursor.fetchall()}
+    for progress in rows:
+        progress.pk, progress.total_time_seconds, progress.created_at = stored[progress.book_id]
+        progress._state.adding = False
+
+
+def apply_progress_events(user, events):
+    """Apply validated ProgressEventSerializer events; {'progress': {...}, 'sessions': n, 'skipped': n}."""
+    now = timezone.now()
+    ordered = sorted(
+        (dict(event, timestamp=min(event['timestamp'], now)) for event in events),
+        key=lambda event: event['timestamp'],
+    )
+    pages = dict(
+        Book.objects.filter(pk__in={e['book_id'] for e in ordered}, is_published=True)
+        .values_list('pk', 'pages')
+    )
+    ordered = [e for e in ordered if e['book_id'] in pages]
+    skipped = len(events) - len(ordered)
+    if not ordered:
+        return {'progress': {}, 'sessions': 0, 'skipped': skipped}
+
+    with transaction.atomic():
+        # Same lock order as reading.heartbeat: sessions first, then progress
+        session_ids = {e['session_id'] for e in ordered if e.get('session_id')}
+        sessions = {
+            session.pk: session
+            for session in ReadingSession.objects.select_for_update().filter(
+                pk__in=session_ids, user=user, **session_started_filter(session_ids)
+            ).order_by('pk')
+        }
+        existing = {
+            progress.book_id: progress
+            for progress in ReadingProgress.objects.select_for_update().filter(
+                user=user, book_id__in=pages
+            ).order_by('pk')
+        }
+        # Server time of the last write per book; older events lose on position
+        synced_at = {book_id: progress.last_opened_at for book_id, progress in existing.items()}
+
+        merged = {}
+        touched = {}
+        session_deltas = {}
+        for event in ordered:
+            book_id = event['book_id']
+            progress = merged.get(book_id)
+            if progress is None:
+                progress = existing.get(book_id) or ReadingProgress(
+                    user=user, book_id=book_id, last_location='0', current_page=0, percent=0.0,
+                )
+                merged[book_id] = progress
+
+            session = sessions.get(event.get('session_id'))
+            if session is not None and session.book_id != book_id:
+                session = None
+            time_spent = event.get('time_spent') or 0
+            progress.total_time_seconds += time_spent
+            if session is not None:
+                session.last_activity_at = max(session.last_activity_at, event['timestamp'])
+                touched[session.pk] = session
+            if session is not None and time_spent:
+                session.duration_seconds += time_spent
+                session_deltas.setdefault(session.pk, {'seconds': 0, 'pages': 0})['seconds'] += time_spent
+
+            # Time is additive; position is last-write-wins
+            if book_id in synced_at and event['timestamp'] <= synced_at[book_id]:
+                continue
+
+            current_page = event.get('current_page')
+            if current_page is not None:
+                if session is not None and current_page > progress.current_page:
+                    session.pages_read += current_page - progress.current_page
+                    session_deltas.setdefault(session.pk, {'seconds': 0, 'pages': 0})['pages'] += (
+                        current_page - progress.current_page
+                    )
+                progress.current_page = current_page
+                if pages[book_id]:
+                    progress.percent = min(current_page * 100.0 / pages[book_id], 100.0)
+                elif event.get('percent') is not None:
+                    progress.percent = event['percent']
+            elif event.get('percent') is not None:
+                progress.percent = event['percent']
+            if event.get('location'):
+                progress.last_location = event['location']
+
+        for progress in merged.values():
+            progress.completed = progress.percent >= COMPLETION_PERCENT
+            progress.last_opened_at = now
+            progress.updated_at = now
+
+        # Locked rows already hold the merged totals; new rows go through an additive upsert
+        ReadingProgress.objects.bulk_update(
+            [progress for book_id, progress in merged.items() if book_id in existing], PROGRESS_UPDATE_FIELDS
+        )
+        _insert_progress([progress for book_id, progress in merged.items() if book_id not in existing], now)
+        if touched:
+            # Position-only events still move last_activity_at, or the reaper would close the session
+            started = [session.started_at for session in touched.values()]
+            ReadingSession.objects.filter(started_at__gte=min(started), started_at__lte=max(started)).bulk_update(
+                list(touched.values()), ['duration_seconds', 'pages_read', 'last_activity_at']
+            )
+        if session_deltas:
+            record_reading_activity(
+                {
+                    'user_id': user.pk,
+                    'book_id': sessions[pk].book_id,
+                    'started_at': sessions[pk].started_at,
+                    **delta,
+                }
+                for pk, delta in session_deltas.items()
+            )
+        bump_dashboard_generation(user.pk)
+
+    return {'progress': merged, 'sessions': len(touched), 'skipped': skipped}
@@ -0,0 +1,271 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from catalog.models import Author, Book
+from .heartbeat import get_idle_window, record_heartbeat
+from .highlights import delete_highlights
+from .models import (
+    Highlight, ReadingDay, ReadingProgress, ReadingSession, ReadingStreak, session_started_filter,
+    session_started_range,
+)
+from .reaper import close_idle_sessions
+from .rollups import get_reading_timezone, rebuild_reading_days
+from .streaks import get_streak_days, rebuild_reading_streaks, record_reading_day
+from .sync import _insert_progress, apply_progress_events
+
+
+def make_user(email='reader@example.com'):
+    return get_user_model().objects.create_user(email=email, password='secret', name='Reader')
+
+
+def make_book(isbn='0000000000001', pages=100):
+    author, _ = Author.objects.get_or_create(name='Chinua Achebe')
+    return Book.objects.create(
+        title=f'Things Fall Apart {isbn}', author=author, description='A novel', isbn=isbn,
+        file_type='PDF', pages=pages,
+    )
+
+
+def reading_days(user):
+    return sorted(
+        (row.day, row.seconds, row.pages, row.sessions, row.books, sorted(row.book_ids), row.hourly_seconds)
+        for row in ReadingDay.objects.filter(user=user)
+    )
+
+
+class ReadingDayRollupTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.book = make_book()
+
+    def test_incremental_rollup_matches_rebuild(self):
+        first = ReadingSession.objects.create(user=self.user, book=self.book)
+        first.duration_seconds = 300
+        first.pages_read = 4
+        first.save()
+        ReadingSession.objects.create(user=self.user, book=make_book('0000000000002'), duration_seconds=60)
+
+        incremental = reading_days(self.user)
+        rebuild_reading_days([self.user.pk])
+        self.assertEqual(reading_days(self.user), incremental)
+        self.assertEqual(incremental[0][1:5], (360, 4, 2, 2))
+
+
+class ReadingStreakTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    def read_on(self, *days):
+        for day in days:
+            record_reading_day(self.user.pk, datetime(day.year, day.month, day.day, 12, tzinfo=get_reading_timezone()))
+
+    def test_consecutive_days_extend_and_gaps_restart(self):
+        start = date(2026, 10, 1)
+        self.read_on(start, start, start + timedelta(days=1), start + timedelta(days=2))
+        self.assertEqual(get_streak_days(self.user, start + timedelta(days=2)), (3, 3))
+        # The run survives the day after last_active, not the one after that
+        self.assertEqual(get_streak_days(self.user, start + timedelta(days=3)), (3, 3))
+        self.assertEqual(get_streak_days(self.user, start + timedelta(days=4)), (0, 3))
+
+        self.read_on(start + timedelta(days=5))
+        self.assertEqual(get_streak_days(self.user, start + timedelta(days=5)), (1, 3))
+
+    def test_replayed_earlier_day_leaves_streak(self):
+        start = date(2026, 10, 1)
+        self.read_on(start + timedelta(days=3), start)
+        streak = ReadingStreak.objects.get(user=self.user)
+        self.assertEqual((streak.current_start, streak.last_active, streak.longest_days),
+                         (start + timedelta(days=3), start + timedelta(days=3), 1))
+
+    def test_rebuild_walks_reading_days(self):
+        start = date(2026, 10, 1)
+        for offset in (0, 1, 2, 5, 6):
+            ReadingDay.objects.create(user=self.user, day=start + timedelta(days=offset), sessions=1)
+        rebuild_reading_streaks([self.user.pk])
+        self.assertEqual(get_streak_days(self.user, start + timedelta(days=6)), (2, 3))
+
+    def test_no_history_is_zero(self):
+        self.assertEqual(get_streak_days(self.user, date(2026, 10, 1)), (0, 0))
+
+
+class ProgressSyncTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.book = make_book()
+
+    def test_position_only_event_moves_last_activity(self):
+        session = ReadingSession.objects.create(user=self.user, book=self.book)
+        ReadingSession.objects.filter(pk=session.pk).update(last_activity_at=timezone.now() - timedelta(hours=1))
+        event_at = timezone.now() - timedelta(minutes=1)
+
+        result = apply_progress_events(self.user, [
+            {'book_id': self.book.pk, 'session_id': session.pk, 'timestamp': event_at, 'current_page': 0},
+        ])
+        session.refresh_from_db()
+        self.assertEqual(session.last_activity_at, event_at)
+        self.assertEqual(result['sessions'], 1)
+
+    def test_time_is_summed_into_progress(self):
+        now = timezone.now()
+        apply_progress_events(self.user, [
+            {'book_id': self.book.pk, 'timestamp': now - timedelta(minutes=2), 'current_page': 10, 'time_spent': 60},
+        ])
+        result = apply_progress_events(self.user, [
+            {'book_id': self.book.pk, 'timestamp': timezone.now(), 'current_page': 20, 'time_spent': 30},
+        ])
+        progress = ReadingProgress.objects.get(user=self.user, book=self.book)
+        self.assertEqual((progress.total_time_seconds, progress.current_page), (90, 20))
+        self.assertEqual(result['progress'][self.book.pk].total_time_seconds, 90)
+
+    def test_row_created_concurrently_keeps_its_time(self):
+        ReadingProgress.objects.create(
+            user=self.user, book=self.book, last_location='5', current_page=5, percent=5.0, total_time_seconds=100,
+        )
+        row = ReadingProgress(
+            user=self.user, book_id=self.book.pk, last_location='8', current_page=8, percent=8.0,
+            total_time_seconds=40,
+        )
+        _insert_progress([row], timezone.now())
+
+        stored = ReadingProgress.objects.get(user=self.user, book=self.book)
+        self.assertEqual((stored.total_time_seconds, stored.current_page), (140, 8))
+        self.assertEqual((row.pk, row.total_time_seconds), (stored.pk, 140))
+
+
+class SessionClosingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.book = make_book()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def open_session(self, idle):
+        session = ReadingSession.objects.create(user=self.user, book=self.book)
+        ReadingSession.objects.filter(pk=session.pk).update(last_activity_at=timezone.now() - idle)
+        return session
+
+    def test_starting_again_flushes_and_credits_the_open_session(self):
+        session = self.open_session(timedelta(minutes=2))
+        record_heartbeat(session.pk, self.user, current_page=3)
+        # Coalesced: parked in the cache, not written yet
+        record_heartbeat(session.pk, self.user, current_page=7)
+
+        response = self.client.post(f'/api/reading/sessions/{self.book.pk}/start/')
+        self.assertEqual(response.status_code, 200)
+        session.refresh_from_db()
+        self.assertIsNotNone(session.ended_at)
+        self.assertEqual(session.pages_read, 4)
+        self.assertEqual(ReadingProgress.objects.get(user=self.user, book=self.book).current_page, 7)
+        self.assertGreaterEqual(session.duration_seconds, 120)
+        self.assertEqual(ReadingDay.objects.get(user=self.user).seconds, session.duration_seconds)
+
+    def test_starting_again_caps_the_idle_gap(self):
+        session = self.open_session(timedelta(days=1))
+        self.client.post(f'/api/reading/sessions/{self.book.pk}/start/')
+        session.refresh_from_db()
+        self.assertEqual(session.duration_seconds, int(get_idle_window().total_seconds()))
+
+    def test_reaper_ends_idle_sessions_at_their_last_activity(self):
+        idle = self.open_session(get_idle_window() + timedelta(minutes=5))
+        active = self.open_session(timedelta(minutes=1))
+
+        self.assertEqual(close_idle_sessions(), 1)
+        idle.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual((idle.ended_at, idle.duration_seconds), (idle.last_activity_at, 0))
+        self.assertIsNone(active.ended_at)
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.book = make_book()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_average_session_counts_ended_sessions_only(self):
+        for seconds in (100, 300):
+            ReadingSession.objects.create(
+                user=self.user, book=self.book, duration_seconds=seconds, ended_at=timezone.now(),
+            )
+        ReadingSession.objects.create(user=self.user, book=self.book, duration_seconds=5)
+
+        response = self.client.get('/api/reading/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats']['average_session_seconds'], 200)
+        self.assertEqual(response.data['stats']['total_time_seconds'], 405)
+
+
+class SessionIdTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.book = make_book()
+
+    def test_new_ids_bound_started_at(self):
+        session = ReadingSession.objects.create(user=self.user, book=self.book)
+        earliest, latest = session_started_range(session.pk)
+        self.assertTrue(earliest <= session.started_at <= latest)
+        self.assertEqual(ReadingSession.objects.get(pk=session.pk, **session_started_filter([session.pk])), session)
+
+    def test_random_ids_are_looked_up_unbounded(self):
+        session = ReadingSession.objects.create(id=uuid.uuid4(), user=self.user, book=self.book)
+        self.assertIsNone(session_started_range(session.pk))
+        self.assertEqual(session_started_filter([session.pk]), {})
+        self.assertIsNotNone(record_heartbeat(session.pk, self.user, current_page=2))
+
+
+class HighlightSyncTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.book = make_book()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/reading/highlights/{self.book.pk}/'
+        self.kept, self.removed = (
+            Highlight.objects.create(
+                user=self.user, book=self.book, page_number=page, text_content='text', position_data={'page': page},
+            )
+            for page in (3, 40)
+        )
+
+    def sync(self, since, **params):
+        response = self.client.get(self.url, {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_delta_has_changes_and_tombstones(self):
+        first = self.sync('')
+        self.assertTrue(first['reset'])
+        self.assertEqual(len(first['highlights']), 2)
+
+        Highlight.objects.filter(pk=self.kept.pk).update(note='later', updated_at=timezone.now())
+        self.assertEqual(delete_highlights(self.user.pk, self.book.pk, [self.removed.pk]), [self.removed.pk])
+
+        delta = self.sync(first['cursor'])
+        self.assertFalse(delta['reset'])
+        self.assertEqual([row['id'] for row in delta['highlights']], [str(self.kept.pk)])
+        self.assertEqual(delta['deleted'], [self.removed.pk])
+
+    def test_page_range_limits_the_fetch(self):
+        data = self.sync('', pages='1-10')
+        self.assertEqual([row['id'] for row in data['highlights']], [str(self.kept.pk)])
+
+    def test_cursor_older_than_tombstones_resets(self):
+        since = (timezone.now() - timedelta(days=365)).isoformat()
+        data = self.sync(since)
+        self.assertTrue(data['reset'])
+        self.assertEqual(data['deleted'], [])
+
+    def test_malformed_or_naive_cursor_is_rejected(self):
+        for since in ('yesterday', '2026-10-01T00:00:00'):
+            response = self.client.get(self.url, {'since': since})
+            self.assertEqual(response.status_code, 400, since)
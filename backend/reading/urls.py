@@ -9,6 +9,10 @@ urlpatterns = [
     path('sessions/<str:session_id>/end/', views.end_reading_session, name='end-reading-session'),
     path('sessions/<str:book_id>/active/', views.get_or_create_active_session, name='get-or-create-session'),
     path('sessions/<str:session_id>/update/', views.update_session_progress, name='update-session-progress'),
+    path('sync/', views.sync_reading_progress, name='sync-reading-progress'),
+    # Before highlights/<book_id>/, which would otherwise capture 'search'
+    path('highlights/search/', views.HighlightSearchView.as_view(), name='highlight-search'),
     path('highlights/<str:book_id>/', views.book_highlights, name='book-highlights'),
+    path('highlights/<str:book_id>/bulk/', views.bulk_highlights, name='bulk-highlights'),
     path('highlights/<str:highlight_id>/detail/', views.highlight_detail, name='highlight-detail'),
 ]
@@ -1,19 +1,35 @@
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.shortcuts import get_object_or_404
 from datetime import datetime, timedelta
 from django.db.models import Sum, Avg, Q, Count, F
 from django.db.models.functions import ExtractHour, ExtractWeekDay
 
-from .models import ReadingProgress, ReadingSession, Highlight
-from .serializers import ReadingProgressSerializer, ReadingSessionSerializer, HighlightSerializer
+from .models import ReadingProgress, ReadingSession, Highlight, ReadingDay, session_started_filter
+from .serializers import (
+    ReadingProgressSerializer, ReadingSessionSerializer, HighlightSerializer, ProgressSyncSerializer,
+    HighlightBulkSerializer, HighlightSearchResultSerializer
+)
+from .heartbeat import flush_pending_heartbeat, get_idle_window, record_heartbeat
+from .sync import apply_progress_events
+from .rollups import get_reading_days, reading_localtime, reading_today
+from .streaks import get_streak_days
+from .reaper import close_sessions, get_idle_cutoff
+from .highlights import apply_highlight_ops, delete_highlights, get_highlight_changes, parse_page_range
+from .search import search_highlights
+from .cache import DASHBOARD_CACHE_TIMEOUT, dashboard_cache_key
 # Assuming ReadingStatsSerializer is also available, though not used directly in views.
 # from .serializers import ReadingStatsSerializer 
-from catalog.models import Book, BookLike, Bookmark
-from analytics.models import BookView
+from catalog.models import Book, BookLike, Bookmark, Category
+from catalog.search import get_search_text
+from analytics.view_buffer import get_viewer_key, record_book_view
 def _absolute_media_url(request, file_field):
     if not file_field:
         return None
@@ -93,8 +109,14 @@ class ReadingProgressView(generics.RetrieveUpdateAPIView):
 def user_dashboard(request):
     """Get user dashboard data"""
     user = request.user
-    today = timezone.now().date()
+    today = reading_today()
     period = request.query_params.get('period', 'all')
+
+    # Repeat loads are one cache read; the user's writes bump the key (see reading.cache)
+    cache_key = dashboard_cache_key(user.pk, period)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return Response(cached)
     
     try:
         # Determine start date for period
@@ -112,134 +134,80 @@ def user_dashboard(request):
         in_progress = ReadingProgress.objects.filter(
             user=user,
             completed=False
-        ).order_by('-last_opened_at')[:10]
+        ).select_related('book__author').order_by('-last_opened_at')[:10]
         
         completed = ReadingProgress.objects.filter(
             user=user,
             completed=True
-        ).order_by('-updated_at')[:10]
+        ).select_related('book__author').order_by('-updated_at')[:10]
         
-        # ... (liked/bookmarked books code unchanged) ...
-        liked_books = BookLike.objects.filter(user=user).select_related('book').order_by('-created_at')[:10]
-        liked_book_ids = [like.book_id for like in liked_books]
-        liked_books_data = Book.objects.filter(pk__in=liked_book_ids, is_published=True).order_by('-created_at')
+        # Last 10 likes (subquery) and last 10 bookmarks, published books only
+        recent_likes = BookLike.objects.filter(user=user).order_by('-created_at').values('book_id')[:10]
+        liked_books_data = Book.objects.filter(
+            pk__in=recent_likes, is_published=True
+        ).select_related('author').order_by('-created_at')
         
-        bookmarked_books_qs = Bookmark.objects.filter(user=user).select_related('book').order_by('-created_at')[:10]
-        bookmarked_book_ids = [bookmark.book_id for bookmark in bookmarked_books_qs]
-        bookmarked_books_data = Book.objects.filter(pk__in=bookmarked_book_ids, is_published=True)
+        bookmarked_books_qs = Bookmark.objects.filter(
+            user=user, book__is_published=True
+        ).select_related('book__author').order_by('-created_at')[:10]
         
         # Calculate stats
-        # Total books read (if period is all, all time. If period specific, in that period)
+        # Total books read (if period is all, all time. If period specific, in that period),
+        # and books completed this year for the reading goal, in one query
         completed_qs = ReadingProgress.objects.filter(user=user, completed=True)
-        if start_date:
-            completed_qs = completed_qs.filter(updated_at__gte=start_date)
-        total_books_read = completed_qs.count()
+        completed_counts = completed_qs.aggregate(
+            period=Count('pk', filter=Q(updated_at__gte=start_date) if start_date else None),
+            year=Count('pk', filter=Q(updated_at__year=today.year)),
+        )
+        total_books_read = completed_counts['period']
         
-        # Total time (sum of sessions in period)
-        sessions_qs = ReadingSession.objects.filter(user=user)
+        # Period totals (time, pages, sessions) from the daily rollup
+        days_qs = ReadingDay.objects.filter(user=user)
         if start_date:
-            sessions_qs = sessions_qs.filter(started_at__gte=start_date)
-            
-        time_sum = sessions_qs.aggregate(Sum('duration_seconds'))
-        total_time_seconds = time_sum['duration_seconds__sum'] or 0
-        
-        # Total pages read
-        try:
-            # Try specific activity tracking first (requires migration)
-            pages_sum = sessions_qs.aggregate(Sum('pages_read'))
-            total_pages_read = pages_sum['pages_read__sum'] or 0
-        except Exception:
-            # Fallback to legacy logic (books completed) if migration missing
-            total_pages_read = sum(
-                progress.book.pages or 0 for progress in 
-                completed_qs.select_related('book')
-            )
+            days_qs = days_qs.filter(day__gte=reading_localtime(start_date).date())
+        totals = days_qs.aggregate(seconds=Sum('seconds'), pages=Sum('pages'), sessions=Sum('sessions'))
+        total_time_seconds = totals['seconds'] or 0
+        total_pages_read = totals['pages'] or 0
         
         # ... (streak and other stats) ...
-        # Improved Streak Calculation (Streak is generally "current", not dependent on period view usually?)
-        # User wants "data according to duration". But streak is "current status". Keep streak as is.
-        current_streak_days = 0
-        longest_streak = 0
-        
-        # Get all dates with reading activity (from sessions) - All time needed for streak
-        all_sessions = ReadingSession.objects.filter(user=user).order_by('-started_at')
-        
-        if all_sessions.exists():
-            # Get unique dates, sorted descending
-            session_dates = sorted(
-                list(set(s.started_at.astimezone(timezone.get_current_timezone()).date() for s in all_sessions)), 
-                reverse=True
-            )
-            
-            # Calculate Current Streak
-            if session_dates and (session_dates[0] == today or session_dates[0] == today - timedelta(days=1)):
-                current_streak_days = 1
-                expected_date = session_dates[0] - timedelta(days=1)
-                
-                for date in session_dates[1:]:
-                    if date == expected_date:
-                        current_streak_days += 1
-                        expected_date -= timedelta(days=1)
-                    elif date < expected_date:
-                        break
-            
-            # Calculate Longest Streak
-            current_sequence = 0
-            longest_streak = 0
-            if session_dates:
-                dates_asc = sorted(session_dates)
-                current_sequence = 1
-                longest_streak = 1
-                for i in range(1, len(dates_asc)):
-                    if dates_asc[i] == dates_asc[i-1] + timedelta(days=1):
-                        current_sequence += 1
-                    else:
-                        current_sequence = 1
-                    longest_streak = max(longest_streak, current_sequence)
+        # Streaks are stored and advanced as sessions start (see reading.streaks)
+        current_streak_days, longest_streak = get_streak_days(user, today)
 
         # ... (Average session, likes, bookmarks) ...
         # Reading goal progress
-        books_read_year = ReadingProgress.objects.filter(
-            user=user, 
-            completed=True, 
-            updated_at__year=today.year
-        ).count()
+        books_read_year = completed_counts['year']
         reading_goal_progress = min(books_read_year / 12 * 100, 100)
         
-        # Average session duration (in period?)
+        # Average session duration (in period), over ended sessions only: open ones are partial
         avg_session_qs = ReadingSession.objects.filter(user=user, ended_at__isnull=False)
         if start_date:
             avg_session_qs = avg_session_qs.filter(started_at__gte=start_date)
-        avg_session = avg_session_qs.aggregate(avg=Avg('duration_seconds'))
-        average_session_seconds = avg_session['avg'] or 0
+        average_session_seconds = avg_session_qs.aggregate(avg=Avg('duration_seconds'))['avg'] or 0
         
         total_likes = BookLike.objects.filter(user=user).count()
         total_bookmarks = Bookmark.objects.filter(user=user).count()
         
-        # Favorite Category
-        favorite_category = None
-        category_counts = {}
-        # Use completed books in period for favorite category? Or all time? 
-        # Usually "My stats" implies current state. But if filtering... let's filter.
-        for progress in completed_qs.select_related('book'):
-             if progress.book_id:
-                for category in progress.book.categories.all():
-                    category_name = category.name
-                    if category_name:
-                        category_counts[category_name] = category_counts.get(category_name, 0) + 1
-        if category_counts:
-             favorite_category = max(category_counts, key=category_counts.get)
+        # Favorite Category: most common category among books completed in the period
+        if start_date:
+            completed_qs = completed_qs.filter(updated_at__gte=start_date)
+        favorite_category = (
+            Category.objects.filter(books__reading_progresses__in=completed_qs)
+            .exclude(name='')
+            .annotate(completed_books=Count('books__reading_progresses'))
+            .order_by('-completed_books', 'name')
+            .values_list('name', flat=True)
+            .first()
+        )
+
+        # Last 30 days of rollup rows back both charts below (one query)
+        recent_days = get_reading_days(user, today - timedelta(days=29))
 
         # Daily Activity (Last 14 days) - Fixed for chart
         daily_activity = []
         for i in range(14):
             date = today - timedelta(days=i)
-            day_sessions = ReadingSession.objects.filter(
-                user=user,
-                started_at__date=date
-            ).aggregate(total_time=Sum('duration_seconds'))
-            
-            minutes = round((day_sessions['total_time'] or 0) / 60)
+            reading_day = recent_days.get(date)
+            minutes = round(reading_day.seconds / 60) if reading_day else 0
             
             daily_activity.append({
                 'date': date.strftime('%Y-%m-%d'),
@@ -251,12 +219,7 @@ def user_dashboard(request):
         streak_history = []
         for i in range(30):
             date = today - timedelta(days=29-i)
-            # Optimize: check if date in session_datesset?
-            # Re-querying in loop is okay for 30 items
-            has_reading = ReadingSession.objects.filter(
-                user=user,
-                started_at__date=date
-            ).exists()
+            has_reading = date in recent_days and recent_days[date].sessions > 0
             streak_history.append({
                 'date': date.strftime('%Y-%m-%d'),
                 'read': has_reading
@@ -292,17 +255,18 @@ def user_dashboard(request):
             ],
             'bookmarked_books': [
                 {
-                    'id': str(book.id),
-                    'title': book.title,
-                    'author': book.author.name if book.author else "Unknown",
-                    'cover_image': _absolute_media_url(request, book.cover_image),
-                    'location': next((b.location for b in bookmarked_books_qs if b.book_id == book.id), None),
-                    'created_at': next((b.created_at for b in bookmarked_books_qs if b.book_id == book.id), None),
-                } for book in bookmarked_books_data
+                    'id': str(bookmark.book.id),
+                    'title': bookmark.book.title,
+                    'author': bookmark.book.author.name if bookmark.book.author else "Unknown",
+                    'cover_image': _absolute_media_url(request, bookmark.book.cover_image),
+                    'location': bookmark.location,
+                    'created_at': bookmark.created_at,
+                } for bookmark in bookmarked_books_qs
             ],
             'stats': stats
         }
         
+        cache.set(cache_key, response_data, DASHBOARD_CACHE_TIMEOUT)
         return Response(response_data)
     
     except Exception as e:
@@ -339,19 +303,17 @@ def start_reading_session(request, book_id):
     # FIX: Use standard get_object_or_404
     book = get_object_or_404(Book, pk=book_id, is_published=True)
     
-    # FIX: Converted MongoEngine update logic to Django ORM filter().update()
-    # ended_at__exists=False becomes ended_at__isnull=True
-    ReadingSession.objects.filter(
-        user=request.user, # Use User object
-        book=book,
-        ended_at__isnull=True
-    ).update(ended_at=timezone.now())
+    # Close the open sessions on this book like end_reading_session would (see reading.reaper)
+    with transaction.atomic():
+        open_sessions = ReadingSession.objects.select_for_update().filter(
+            user=request.user, # Use User object
+            book=book,
+            ended_at__isnull=True
+        ).values_list('pk', 'user_id')
+        close_sessions(list(open_sessions), ended_at=timezone.now())
     
-    # Create BookView record for analytics
-    BookView.objects.create(
-        user=request.user,
-        book=book
-    )
+    # Buffered BookView for analytics; starting a session does not bump view_count
+    record_book_view(book.pk, get_viewer_key(request), user=request.user, count=False)
     
     # Start new session
     # FIX: Converted MongoEngine create to Django ORM create
@@ -375,13 +337,22 @@ def end_reading_session(request, session_id):
         session = ReadingSession.objects.get(
             pk=session_id,
             user=request.user, # Use User object
-            ended_at__isnull=True
+            ended_at__isnull=True,
+            **session_started_filter([session_id])
         )
     except ReadingSession.DoesNotExist:
         return Response({'error': 'Session not found or already ended'}, status=status.HTTP_404_NOT_FOUND)
     
+    # Apply the last coalesced heartbeat so its page/progress is not lost
+    if flush_pending_heartbeat(session.pk, request.user.pk) is not None:
+        session.refresh_from_db()
+
     session.ended_at = timezone.now()
-    session.duration_seconds = int((session.ended_at - session.started_at).total_seconds())
+    # Like a heartbeat: add the time since the last activity, capped at the idle window
+    session.duration_seconds += max(int(min(
+        session.ended_at - session.last_activity_at, get_idle_window()
+    ).total_seconds()), 0)
+    session.last_activity_at = max(session.last_activity_at, session.ended_at)
     session.save()
     
     return Response(ReadingSessionSerializer(session).data)
@@ -393,12 +364,14 @@ def get_or_create_active_session(request, book_id):
     """Get active session or create a new one for a book"""
     book = get_object_or_404(Book, pk=book_id, is_published=True)
     
-    # Check for existing active session
+    # Check for existing active session; an idle one is left for the reaper (reading.reaper)
+    # rather than resumed, which would stretch its duration over the idle gap
     active_session = ReadingSession.objects.filter(
         user=request.user,
         book=book,
-        ended_at__isnull=True
-    ).first()
+        ended_at__isnull=True,
+        last_activity_at__gte=get_idle_cutoff()
+    ).order_by('-last_activity_at').first()
     
     if active_session:
         return Response(ReadingSessionSerializer(active_session).data)
@@ -416,110 +389,94 @@ def get_or_create_active_session(request, book_id):
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
 def update_session_progress(request, session_id):
-    """Update reading session with current progress"""
+    """Update reading session with current progress (coalesced heartbeat, see reading.heartbeat)"""
     try:
-        session = ReadingSession.objects.get(
-            pk=session_id,
-            user=request.user,
-            ended_at__isnull=True
-        )
-    except ReadingSession.DoesNotExist:
-        return Response({'error': 'Active session not found'}, status=status.HTTP_404_NOT_FOUND)
-    
-    # Update session duration
-    now = timezone.now()
-    # Calculate duration since last update or start
-    # We need to be careful not to double count. 
-    # Simplest way: Calculate total duration of session and update.
-    # But for ReadingProgress, we need the *delta* added since last time?
-    # actually, ReadingProgress.total_time_seconds is a cumulative counter.
-    # So we should probably add the difference between now and the last time we updated.
-    # However, we don't store "last_updated_time" for the session specifically for this calculation in a granular way easily without risk.
-    # Better approach: Calculate the new total duration of the session.
-    # The contribution of this session to the total book time is (new_duration - old_duration).
-    
-    old_duration = session.duration_seconds
-    new_duration = int((now - session.started_at).total_seconds())
-    
-    session.duration_seconds = new_duration
-    session.save()
-    
-    # Calculate time delta to add to ReadingProgress
-    time_delta = new_duration - old_duration
-    
-    # Also update reading progress if data provided
-    current_page = request.data.get('current_page')
-    percent = request.data.get('percent')
+        current_page = request.data.get('current_page')
+        current_page = int(current_page) if current_page is not None else None
+        percent = request.data.get('percent')
+        percent = float(percent) if percent is not None else None
+    except (TypeError, ValueError):
+        return Response({'error': 'current_page and percent must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
     location = request.data.get('location')
-    
-    # Always update progress time if there is a delta, even if no page change
-    # But we need a progress object.
-    progress, created = ReadingProgress.objects.get_or_create(
-        user=request.user,
-        book=session.book,
-        defaults={
-            'last_location': location or '0',
-            'current_page': current_page or 0,
-            'percent': percent or 0.0,
-            'total_time_seconds': 0
-        }
+
+    data = record_heartbeat(
+        session_id, request.user,
+        current_page=current_page, percent=percent, location=location
     )
-    
-    # Calculate Page Delta
-    if current_page is not None:
-        old_page = progress.current_page
-        new_page = int(current_page)
-        # Only count forward progress for statistics? 
-        # Or count any pages read? Usually "pages read" means volume.
-        # But if I flip back and forth, does it count?
-        # Let's assume net progress for now to avoid gaming, or just simple absolute difference?
-        # Standard: max(0, new - old).
-        pages_delta = max(0, new_page - old_page)
-        
-        if pages_delta > 0:
-            session.pages_read += pages_delta
-            session.save()
-            
-    if time_delta > 0:
-        progress.total_time_seconds += time_delta
-
-    if not created:
-        if location:
-            progress.last_location = location
-        if current_page is not None:
-            progress.current_page = int(current_page)
-            # Calculate percent from page if book has pages
-            if session.book.pages and session.book.pages > 0:
-                progress.percent = (float(current_page) / float(session.book.pages)) * 100
-        elif percent is not None:
-            progress.percent = float(percent)
-        
-        progress.last_opened_at = timezone.now()
-        progress.completed = progress.percent >= 95.0
-        progress.save()
-    else:
-        # If created, we might still need to save the time_delta if it was > 0 (unlikely on create but possible if logic changes)
-        if time_delta > 0:
-             progress.save()
-    
-    return Response(ReadingSessionSerializer(session).data)
+    if data is None:
+        return Response({'error': 'Active session not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_reading_progress(request):
+    """Replay reader events queued offline ({"events": [...]}) in one transaction"""
+    serializer = ProgressSyncSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    result = apply_progress_events(request.user, serializer.validated_data['events'])
+    return Response({
+        'progress': [
+            {
+                'book_id': book_id,
+                'last_location': progress.last_location,
+                'current_page': progress.current_page,
+                'percent': progress.percent,
+                'completed': progress.completed,
+                'total_time_seconds': progress.total_time_seconds,
+            }
+            for book_id, progress in result['progress'].items()
+        ],
+        'sessions_updated': result['sessions'],
+        'skipped': result['skipped'],
+    })
+
+
+class HighlightSearchView(generics.ListAPIView):
+    """Full-text search over the user's highlights and notes (?query=, optional ?book=)."""
+    serializer_class = HighlightSearchResultSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        book_id = self.request.query_params.get('book')
+        if book_id is not None and not book_id.isdigit():
+            raise ValidationError({'book': 'A valid book id is required.'})
+        return search_highlights(self.request.user, get_search_text(self.request), book_id=book_id)
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def book_highlights(request, book_id):
-    """Get all highlights for a book or create a new highlight"""
+    """Get highlights for a book (?pages=a-b, ?since=<cursor> for a delta) or create one"""
     book = get_object_or_404(Book, pk=book_id, is_published=True)
     
     if request.method == 'GET':
-        # Get all highlights for this book by this user
-        highlights = Highlight.objects.filter(
-            user=request.user,
-            book=book
-        ).order_by('page_number', 'created_at')
-        
-        serializer = HighlightSerializer(highlights, many=True)
-        return Response(serializer.data)
+        pages = request.query_params.get('pages')
+        since = request.query_params.get('since')
+        try:
+            pages = parse_page_range(pages) if pages else None
+            since_at = parse_datetime(since) if since else None
+            # Cursors are aware timestamps; a naive one cannot be compared with them
+            if since and (since_at is None or timezone.is_naive(since_at)):
+                raise ValueError(since)
+        except ValueError:
+            return Response(
+                {'error': 'pages must be like 12-30 and since a cursor from a previous sync'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        changes = get_highlight_changes(request.user, book, since=since_at, pages=pages)
+        serializer = HighlightSerializer(changes['highlights'], many=True)
+        if since is None:
+            return Response(serializer.data)
+        return Response({
+            'highlights': serializer.data,
+            'deleted': changes['deleted'],
+            'cursor': changes['cursor'].isoformat(),
+            'reset': changes['reset'],
+        })
     
     elif request.method == 'POST':
         # Create a new highlight
@@ -557,17 +514,35 @@ def highlight_detail(request, highlight_id):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
-        # Delete highlight
-        highlight.delete()
+        # Delete highlight, leaving a tombstone for delta sync
+        delete_highlights(request.user.pk, highlight.book_id, [highlight.pk])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_highlights(request, book_id):
+    """Create, update and delete many highlights of a book in one request (all or nothing)"""
+    book = get_object_or_404(Book, pk=book_id, is_published=True)
+    serializer = HighlightBulkSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    result = apply_highlight_ops(request.user, book, **serializer.validated_data)
+    return Response({
+        'created': HighlightSerializer(result['created'], many=True).data,
+        'updated': HighlightSerializer(result['updated'], many=True).data,
+        'deleted': result['deleted'],
+        'not_found': result['not_found'],
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_analytics(request):
     user = request.user
     period = request.query_params.get('period', 'week')
-    today = timezone.now().date()
+    today = reading_today()
     
     # Determine date range
     if period == 'month':
@@ -580,42 +555,23 @@ def user_analytics(request):
         start_date = today - timedelta(days=6) # Last 7 days
         days_range = 7
         
+    # Every chart below reads the daily rollup: one query covering the period and the
+    # 30-day streak window
+    reading_days = get_reading_days(user, min(start_date, today - timedelta(days=29)))
+    period_days = [row for day, row in reading_days.items() if day >= start_date]
+
     # 1. Hourly Distribution (based on period)
-    hourly_stats = ReadingSession.objects.filter(
-        user=user,
-        started_at__date__gte=start_date,
-        started_at__isnull=False
-    ).annotate(
-        hour=ExtractHour('started_at')
-    ).values('hour').annotate(
-        count=Count('id'),
-        total_minutes=Sum('duration_seconds') / 60
-    ).order_by('hour')
-    
-    hourly_data = [{'hour': i, 'minutes': 0} for i in range(24)]
-    for stat in hourly_stats:
-        hour = stat['hour']
-        if 0 <= hour < 24:
-            hourly_data[hour]['minutes'] = round(stat['total_minutes'] or 0)
+    hourly_seconds = [0] * 24
+    for row in period_days:
+        for hour, seconds in enumerate(row.hourly_seconds):
+            hourly_seconds[hour] += seconds
+    hourly_data = [{'hour': i, 'minutes': round(hourly_seconds[i] / 60)} for i in range(24)]
             
     # 2. Daily Distribution (replaces weekly_distribution)
-    daily_stats = ReadingSession.objects.filter(
-        user=user,
-        started_at__date__gte=start_date,
-        started_at__isnull=False
-    ).annotate(
-        date=F('started_at__date')
-    ).values('date').annotate(
-        total_minutes=Sum('duration_seconds') / 60
-    ).order_by('date')
-    
-    # Create map for easy lookup
-    stats_map = {stat['date']: stat['total_minutes'] for stat in daily_stats if stat['date']}
-    
     daily_distribution = []
     for i in range(days_range):
         date = start_date + timedelta(days=i)
-        minutes = round(stats_map.get(date, 0))
+        minutes = round(reading_days[date].seconds / 60) if date in reading_days else 0
         daily_distribution.append({
             'date': date.strftime('%Y-%m-%d'),
             'day_name': date.strftime('%a'), # Mon, Tue
@@ -627,10 +583,7 @@ def user_analytics(request):
     streak_history = []
     for i in range(30):
         date = today - timedelta(days=29-i)
-        has_reading = ReadingSession.objects.filter(
-            user=user,
-            started_at__date=date
-        ).exists()
+        has_reading = date in reading_days and reading_days[date].sessions > 0
         streak_history.append({
             'date': date.strftime('%Y-%m-%d'),
             'read': has_reading
@@ -640,28 +593,12 @@ def user_analytics(request):
 
     # 4. Pages Distribution (Daily)
     pages_daily_activity = []
-    try:
-        pages_stats = ReadingSession.objects.filter(
-            user=user,
-            started_at__date__gte=start_date,
-            started_at__isnull=False
-        ).annotate(
-            date=F('started_at__date')
-        ).values('date').annotate(
-            total_pages=Sum('pages_read')
-        ).order_by('date')
-        
-        pages_map = {stat['date']: stat['total_pages'] for stat in pages_stats if stat['date']}
-        
-        for i in range(days_range):
-            date = start_date + timedelta(days=i)
-            pages = pages_map.get(date, 0)
-            pages_daily_activity.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'pages': pages
-            })
-    except Exception:
-        pass # Return empty list if migration missing
+    for i in range(days_range):
+        date = start_date + timedelta(days=i)
+        pages_daily_activity.append({
+            'date': date.strftime('%Y-%m-%d'),
+            'pages': reading_days[date].pages if date in reading_days else 0
+        })
 
     # 5. Completion Stats (General)
     total_book_progress = ReadingProgress.objects.filter(user=user)
@@ -681,10 +618,7 @@ def user_analytics(request):
     # The frontend uses `total_pages_read` for the card.
     
     # Calculate total pages read (from sessions)
-    try:
-        total_pages_read_sessions = ReadingSession.objects.filter(user=user).aggregate(t=Sum('pages_read'))['t'] or 0
-    except Exception:
-        total_pages_read_sessions = 0
+    total_pages_read_sessions = ReadingDay.objects.filter(user=user).aggregate(t=Sum('pages'))['t'] or 0
     
     # Calculate total pages read (from completed books - legacy proxy)
     total_pages_read_books = sum(p.book.pages or 0 for p in total_book_progress.filter(completed=True).select_related('book'))